@@ -5,10 +5,13 @@ from functools import wraps
 
 from source.data_handler import (
     get_token, save_message_to_json, get_instruction_text,
-    get_user_status, set_user_status)
+    get_user_status, set_user_status, load_bookings, get_upload_queue,
+    get_status_store, get_message_log)
 from source.booking_handler import handle_booking_response, process_booking_request
-from source.view_handler import view_bookings
+from source.view_handler import view_bookings, get_render_cache
 from source.delete_handler import delete_bookings, setup_delete_handlers
+from source.free_handler import free_slots_command, setup_free_handlers
+from source.waitlist_handler import waitlist_command, setup_waitlist, promote_waitlist
 from source.user_handler import (
     init_db, rename_user, is_user_verified, add_user, load_password,
     verify_user, require_verification)
@@ -18,9 +21,19 @@ from source.change_config import (
     get_number_of_concepts, set_gym_closed_period, cancel_gym_closed_period,
     get_gym_closed_periods, is_admin)
 from source.datetime_parser import parse_booking_datetime
+from source.expiry_scheduler import setup_expiry_scheduler
+from source.upload_queue import setup_upload_queue
+from source.status_store import setup_status_flush
+from source.message_log import setup_message_log
+from source.update_processor import PerUserUpdateProcessor
+from source.rate_limiter import get_command_limiter, FloodControlRateLimiter
 
 SAVE_MESSAGES = True
 
+# Persistent keyboard with View and Delete buttons
+MAIN_KEYBOARD = ReplyKeyboardMarkup(
+    [[KeyboardButton("/view"), KeyboardButton("/delete")]], resize_keyboard=True)
+
 # Set up logging
 logger = setup_logging()
 app_logger = get_logger(__name__)
@@ -33,12 +46,12 @@ def rate_limit(func):
     @wraps(func)
     async def wrapped(update: Update, context: CallbackContext, *args, **kwargs):
         user_id = update.effective_user.id
-        if 'last_command_time' not in context.user_data:
-            context.user_data['last_command_time'] = {}
-
-        import time
-        current_time = time.time()
-        context.user_data['last_command_time'][func.__name__] = current_time
+        limiter = get_command_limiter()
+        if not limiter.allow(user_id):
+            # Tell the user once in a while, don't answer every rejected request
+            if limiter.should_notify(user_id) and update.message:
+                await update.message.reply_text("Слишком много запросов. Пожалуйста, подождите немного.")
+            return
         return await func(update, context, *args, **kwargs)
     return wrapped
 
@@ -71,12 +84,6 @@ async def start(update: Update, context: CallbackContext):
     user_name = update.effective_user.first_name
     set_user_status(user_id, 'default')
 
-    # Create a keyboard with View and Delete buttons
-    keyboard = [
-        [KeyboardButton("/view"), KeyboardButton("/delete")]
-    ]
-    reply_markup = ReplyKeyboardMarkup(keyboard, resize_keyboard=True)
-
     # Get messages from texts.json
     welcome_message = get_instruction_text(
         'start_welcome').format(user_name=user_name)
@@ -91,7 +98,7 @@ async def start(update: Update, context: CallbackContext):
     else:
         full_message += help_message
 
-    await update.message.reply_text(full_message, reply_markup=reply_markup, parse_mode='HTML')
+    await update.message.reply_text(full_message, reply_markup=MAIN_KEYBOARD, parse_mode='HTML')
 
     if not is_user_verified(user_id):
         await update.message.reply_text(not_verified_message)
@@ -151,11 +158,7 @@ async def handle_booking_message(update: Update, context: CallbackContext):
 @require_verification
 async def show_buttons(update: Update, context: CallbackContext):
     """Show buttons for view and delete commands as persistent keyboard."""
-    keyboard = [
-        [KeyboardButton("/view"), KeyboardButton("/delete")]
-    ]
-    reply_markup = ReplyKeyboardMarkup(keyboard, resize_keyboard=True)
-    await update.message.reply_text('Выберите действие:', reply_markup=reply_markup)
+    await update.message.reply_text('Выберите действие:', reply_markup=MAIN_KEYBOARD)
 
 
 '''-----------------------------------------ADMIN COMMANDS-----------------------------------------'''
@@ -202,6 +205,9 @@ async def set_number_of_concepts_command(update: Update, context: CallbackContex
     success, message = set_number_of_concepts(user_id, new_number)
 
     await update.message.reply_text(message)
+    if success:
+        # More concepts may fit waiting users
+        await promote_waitlist(context.bot)
 
 
 @rate_limit
@@ -248,6 +254,16 @@ async def view_gym_closing_command(update: Update, context: CallbackContext):
         await update.message.reply_text("В настоящее время нет запланированного закрытия зала.")
 
 
+@rate_limit
+@admin_only
+async def view_cache_stats_command(update: Update, context: CallbackContext):
+    """Обработка команды /view_cache_stats."""
+    stats = get_render_cache().stats()
+    await update.message.reply_text(
+        f"Кэш /view: {stats['hits']} попаданий, {stats['misses']} промахов "
+        f"({stats['hit_rate']:.0%}), записей в кэше: {stats['size']}.")
+
+
 """-----------------------------------------CALLBACKS-----------------------------------------"""
 
 
@@ -341,9 +357,15 @@ async def log_message(update: Update, context: CallbackContext) -> None:
 def main() -> None:
     app_logger.info("Starting bot application")
     init_db()
+    load_bookings()
 
     TOKEN = get_token()
-    application = Application.builder().token(TOKEN).build()
+    # Different users are served concurrently, each user's updates in order
+    # Outgoing messages are paced to stay under Telegram's flood limits
+    application = (Application.builder().token(TOKEN)
+                   .concurrent_updates(PerUserUpdateProcessor())
+                   .rate_limiter(FloodControlRateLimiter())
+                   .build())
 
     # Command handlers
     command_handlers = [
@@ -352,8 +374,10 @@ def main() -> None:
         ("verify", verify_command),
         ("book", book_command),
         ("delete", delete_command),
-        ("view", view_bookings),
-        ("my", view_bookings),
+        ("view", rate_limit(view_bookings)),
+        ("my", rate_limit(view_bookings)),
+        ("free", rate_limit(free_slots_command)),
+        ("waitlist", rate_limit(waitlist_command)),
         ("rename", rename_command),
         ("buttons", show_buttons),
     ]
@@ -370,17 +394,36 @@ def main() -> None:
         ("close_GYM", close_gym_command),
         ("cancel_GYM_closing", cancel_gym_closing_command),
         ("view_GYM_closing", view_gym_closing_command),
+        ("view_cache_stats", view_cache_stats_command),
     ]
 
     for command, handler in admin_command_handlers:
         application.add_handler(CommandHandler(command, handler))
 
+    # Write logged messages in batches
+    setup_message_log(application, get_message_log())
+
+    # Write conversation state to disk shortly after it changes
+    setup_status_flush(application, get_status_store())
+
+    # Upload reports to Yandex Disk in the background
+    setup_upload_queue(application, get_upload_queue())
+
+    # Expire finished bookings in the background
+    setup_expiry_scheduler(application)
+
     # Set up delete handlers first (to handle delete_ callbacks)
     setup_delete_handlers(application)
 
-    # Add callback query handler for view and delete buttons (but not delete_ callbacks)
+    # Free-slot grid buttons book on tap
+    setup_free_handlers(application)
+
+    # Waiting users get places freed by cancellations, expiry or more concepts
+    setup_waitlist(application)
+
+    # Add callback query handler for view and delete buttons (but not delete_, free_ or waitlist callbacks)
     application.add_handler(CallbackQueryHandler(
-        button_callback, pattern='^(?!delete_).*$'))
+        button_callback, pattern='^(?!delete_|free_|wait_|unwait_).*$'))
 
     # Add message handler for all text messages
     application.add_handler(MessageHandler(
@@ -0,0 +1,49 @@
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+# Upper bound on threads doing blocking file/network work for the event loop
+MAX_BLOCKING_WORKERS = 4
+
+_blocking_pool = ThreadPoolExecutor(max_workers=MAX_BLOCKING_WORKERS, thread_name_prefix='blocking-io')
+
+
+async def run_blocking(func, *args, **kwargs):
+    """Run a blocking function on the bounded thread pool and await its result."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_blocking_pool, partial(func, *args, **kwargs))
+
+
+class SerialWriter:
+    """
+    Single background thread that runs persistence work in submission order.
+
+    Stores update their in-memory state on the caller's thread and hand the
+    disk write to the writer, so a slow disk never blocks the event loop while
+    writes still hit the disk in the order the mutations happened.
+    """
+
+    def __init__(self, name='storage-writer'):
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=name)
+
+    def submit(self, func, *args, **kwargs):
+        future = self._executor.submit(func, *args, **kwargs)
+        future.add_done_callback(self._log_error)
+        return future
+
+    @staticmethod
+    def _log_error(future):
+        if not future.cancelled() and future.exception() is not None:
+            logging.error(f"Error in background storage write: {future.exception()}")
+
+    def drain_sync(self):
+        """Block until everything submitted so far has been written."""
+        self._executor.submit(lambda: None).result()
+
+    async def drain(self):
+        """Wait, without blocking the event loop, until everything submitted so far has been written."""
+        await asyncio.wrap_future(self._executor.submit(lambda: None))
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
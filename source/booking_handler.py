@@ -2,16 +2,120 @@ from telegram import Update
 from telegram.ext import CallbackContext
 from datetime import datetime, timedelta
 from source.data_handler import (
-    get_user_status, set_user_status, add_booking, 
-    get_available_places, get_user_name, load_bookings
+    get_user_status, set_user_status, try_book_async, try_book_batch_async, get_user_name
 )
-from source.datetime_parser import parse_booking_datetime
+from source.datetime_parser import parse_booking_datetime, parse_booking_window, parse_booking_series
 from source.valid_book import is_valid_booking_time
 from source.user_handler import is_user_verified
 from source.log_handler import get_logger
+from source.free_handler import find_nearest_slots, suggestion_keyboard, solve_window
+from source.waitlist_handler import waitlist_button
+from telegram import InlineKeyboardMarkup
 
 logger = get_logger(__name__)
 
+# Times a window booking is re-solved if its chosen start is taken concurrently
+WINDOW_BOOKING_ATTEMPTS = 3
+
+
+async def process_window_booking(update: Update, window):
+    """Book the best start time inside a flexible window and confirm it in one message."""
+    user_id = update.effective_user.id
+    if window.end <= datetime.now():
+        await update.message.reply_text("К сожалению это время уже прошло. Пожалуйста, выберите другое время.")
+        return
+    for _ in range(WINDOW_BOOKING_ATTEMPTS):
+        slot = solve_window(window)
+        if slot is None:
+            break
+        attempt = await try_book_async(user_id, slot[0], window.duration, window.places)
+        if attempt.booking_id is not None:
+            start = slot[0]
+            end = start + timedelta(minutes=window.duration)
+            places = window.places
+            await update.message.reply_text(f"Ваше бронирование на {start.strftime('%d.%m')} с {start.strftime('%H:%M')} до {end.strftime('%H:%M')} на {places} концепт{'' if places == 1 else 'а' if places < 5 else 'ов'} подтверждено!")
+            return
+    await update.message.reply_text(
+        f"Извините, с {window.start.strftime('%H:%M')} до {window.end.strftime('%H:%M')} нет времени, "
+        f"где свободно {window.places} концепт{'' if window.places == 1 else 'а' if window.places < 5 else 'ов'} на {window.duration} минут.")
+
+
+def parse_booking_line(line):
+    """Parse one booking line into (start, duration, places), or None."""
+    try:
+        parsed_result = parse_booking_datetime(line)
+    except Exception as e:
+        logger.error(f"Error parsing booking line {line!r}: {e}")
+        return None
+    if isinstance(parsed_result, tuple) and len(parsed_result) == 3 and parsed_result[0] is not None:
+        booking_datetime, places, duration = parsed_result
+        return booking_datetime, duration, places
+    return None
+
+
+def format_booking(start, duration, places):
+    duration_text = f" на {duration} минут" if duration != 60 else ""
+    return f"{start.strftime('%d.%m %H:%M')}{duration_text}, {places} концепт{'' if places == 1 else 'а' if places < 5 else 'ов'}"
+
+
+async def book_batch(update: Update, requests, all_or_nothing=False, failed=()):
+    """
+    Validate (start, duration, places) requests against the timetable and
+    closures, book the valid ones in one store transaction and send one
+    reply listing what was booked and why anything else failed.
+    `failed` holds (label, reason) pairs of requests rejected earlier.
+    """
+    user_id = update.effective_user.id
+    skipped = "не забронировано, так как другие брони не подошли"
+    failed = list(failed)
+    valid = []
+    for start, duration, places in requests:
+        is_valid, error_message = is_valid_booking_time(start, places=places, duration=duration)
+        if is_valid:
+            valid.append((start, duration, places))
+        else:
+            failed.append((format_booking(start, duration, places), error_message))
+    if all_or_nothing and failed:
+        failed.extend((format_booking(*request), skipped) for request in valid)
+        valid = []
+
+    attempts = await try_book_batch_async(user_id, valid, all_or_nothing)
+    booked = []
+    for request, attempt in zip(valid, attempts):
+        if attempt.booking_id is not None:
+            booked.append(format_booking(*request))
+        elif attempt.available < request[2]:
+            failed.append((format_booking(*request), f"свободно только {attempt.available}"))
+        else:
+            failed.append((format_booking(*request), skipped))
+    logger.info(f"User {user_id} booked {len(booked)} of {len(booked) + len(failed)} batch requests")
+
+    lines = [f"Забронировано {len(booked)} из {len(booked) + len(failed)}."]
+    lines.extend(f"✓ {label}" for label in booked)
+    if failed:
+        lines.append("Не удалось:")
+        lines.extend(f"✗ {label} — {reason}" for label, reason in failed)
+    await update.message.reply_text("\n".join(lines))
+
+
+async def process_series_booking(update: Update, series):
+    """Book every occurrence of a weekly series that fits, or all of them with `all_or_nothing`."""
+    await book_batch(update, [(start, series.duration, series.places) for start in series.starts],
+                     series.all_or_nothing)
+
+
+async def process_batch_booking(update: Update, lines):
+    """Book every line of a multi-line message in one transaction, with one reply."""
+    requests, failed = [], []
+    for line in lines:
+        request = parse_booking_line(line)
+        if request is None:
+            failed.append((line, "неподдерживаемый формат"))
+        else:
+            requests.append(request)
+    await book_batch(update, requests, failed=failed)
+
+
 async def process_booking_request(update: Update, context: CallbackContext):
     user_id = update.effective_user.id
     
@@ -23,6 +127,18 @@ async def process_booking_request(update: Update, context: CallbackContext):
         return
 
     message_text = update.message.text
+    lines = [line.strip() for line in message_text.splitlines() if line.strip()]
+    if len(lines) > 1:
+        await process_batch_booking(update, lines)
+        return
+    series = parse_booking_series(message_text)
+    if series is not None:
+        await process_series_booking(update, series)
+        return
+    window = parse_booking_window(message_text)
+    if window is not None:
+        await process_window_booking(update, window)
+        return
     try:
         parsed_result = parse_booking_datetime(message_text)
         if isinstance(parsed_result, tuple) and len(parsed_result) == 3:
@@ -49,31 +165,31 @@ async def process_booking_request(update: Update, context: CallbackContext):
     if not is_valid:
         await update.message.reply_text(error_message)
         return
-    # Load the latest booking data
-    load_bookings()
-
-    # Check available space
-    available_space = get_available_places(booking_datetime)
-    if available_space >= places:
-        # Attempt to add the booking
-        success = add_booking(user_id, booking_datetime, places, duration)
-        if success:
-            duration_text = f" на {duration} минут" if duration != 60 else ""
-            await update.message.reply_text(f"Ваше бронирование на {booking_datetime.strftime('%d.%m в %H:%M')}{duration_text} на {places} концепт{'' if places == 1 else 'а' if places < 5 else 'ов'} подтверждено!")
-        else:
-            await update.message.reply_text("Извините, произошла ошибка при обработке вашего бронирования. Пожалуйста, попробуйте позже.")
+    # Check available space and book in one atomic step
+    attempt = await try_book_async(user_id, booking_datetime, duration, places)
+    if attempt.booking_id is not None:
+        duration_text = f" на {duration} минут" if duration != 60 else ""
+        await update.message.reply_text(f"Ваше бронирование на {booking_datetime.strftime('%d.%m в %H:%M')}{duration_text} на {places} концепт{'' if places == 1 else 'а' if places < 5 else 'ов'} подтверждено!")
     else:
+        available_space = attempt.available
+        # Nearest start times on the same day where all requested places fit, and the waitlist
+        suggestions = suggestion_keyboard(find_nearest_slots(booking_datetime, places, duration), places, duration)
+        keyboard = InlineKeyboardMarkup(
+            [*(suggestions.inline_keyboard if suggestions else ()), [waitlist_button(booking_datetime, places, duration)]])
         if available_space > 0:
             duration_text = f" на {duration} минут" if duration != 60 else ""
             await update.message.reply_text(f"Извините, на это время доступно только {available_space} концепт{'' if available_space == 1 else 'а' if available_space < 5 else 'ов'}{duration_text}. Хотите забронировать доступные места? (Yes/No)")
+            await update.message.reply_text("Или выберите ближайшее время, где есть все места, или встаньте в лист ожидания:", reply_markup=keyboard)
             context.user_data['pending_booking'] = {
                 'datetime': booking_datetime,
                 'places': available_space,
                 'duration': duration
             }
             set_user_status(user_id, 'wait_book_response')
+        elif suggestions:
+            await update.message.reply_text("Извините, на это время нет свободных мест. Ближайшее свободное время или лист ожидания:", reply_markup=keyboard)
         else:
-            await update.message.reply_text("Извините, на это время нет свободных мест. Пожалуйста, выберите другое время.")
+            await update.message.reply_text("Извините, на это время нет свободных мест. Можно встать в лист ожидания:", reply_markup=keyboard)
 
 async def handle_booking_response(update: Update, context: CallbackContext):
     user_id = update.effective_user.id
@@ -87,14 +203,15 @@ async def handle_booking_response(update: Update, context: CallbackContext):
     booking_info = context.user_data['pending_booking']
 
     if user_response == 'yes':
-        success = add_booking(
+        # The free places may have been taken since the offer, so book with a fresh check
+        attempt = await try_book_async(
             user_id, 
             booking_info['datetime'], 
-            booking_info['places'], 
-            booking_info['duration']
+            booking_info['duration'], 
+            booking_info['places']
         )
 
-        if success:
+        if attempt.booking_id is not None:
             booking_time = booking_info['datetime'].strftime('%d.%m в %H:%M')
             duration_text = f" на {booking_info.get('duration', 60)} минут" if booking_info.get('duration', 60) != 60 else ""
             places = booking_info['places']
@@ -103,8 +220,10 @@ async def handle_booking_response(update: Update, context: CallbackContext):
                 await update.message.reply_text(f"Ваше дополнительное бронирование на {booking_time}{duration_text} на {places_text} подтверждено!")
             else:
                 await update.message.reply_text(f"Ваше бронирование на {booking_time}{duration_text} на {places_text} подтверждено!")
+        elif attempt.available > 0:
+            await update.message.reply_text(f"Извините, места уже заняли. Сейчас на это время доступно только {attempt.available} концепт{'' if attempt.available == 1 else 'а' if attempt.available < 5 else 'ов'}. Пожалуйста, отправьте бронирование заново.")
         else:
-            await update.message.reply_text("Извините, произошла ошибка при обработке вашего бронирования. Пожалуйста, попробуйте позже.")
+            await update.message.reply_text("Извините, места уже заняли. На это время нет свободных мест. Пожалуйста, выберите другое время.")
     else:
         await update.message.reply_text("Бронирование отменено. Вы можете сделать новое бронирование.")
 
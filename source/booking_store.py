@@ -0,0 +1,421 @@
+import heapq
+import json
+import logging
+import threading
+from bisect import bisect_left, insort
+from collections import defaultdict, namedtuple
+from datetime import datetime, timedelta, date, time
+from operator import itemgetter
+
+from .file_utils import atomic_write
+from .occupancy import OccupancyTimeline
+
+# Number of journal entries after which the journal is folded into the snapshot
+COMPACT_EVERY = 500
+# Number of locks the days are striped over for check-and-book
+DAY_LOCK_STRIPES = 64
+
+# Result of BookingStore.try_book: the new booking's id (None if it didn't fit)
+# and the number of places free in the window after the attempt
+BookingAttempt = namedtuple('BookingAttempt', ['booking_id', 'available'])
+
+
+def booking_start(booking):
+    """Return the start datetime of a booking."""
+    return datetime.combine(booking['date'], booking['time'])
+
+
+def booking_end(booking):
+    """Return the end datetime of a booking."""
+    return booking_start(booking) + timedelta(minutes=booking.get('duration', 60))
+
+
+def booking_from_json(record):
+    """Convert a booking as stored on disk into the in-memory representation."""
+    booking = dict(record)
+    if isinstance(booking['date'], str):
+        booking['date'] = datetime.strptime(booking['date'], '%Y-%m-%d').date()
+    if isinstance(booking['time'], str):
+        booking['time'] = datetime.strptime(booking['time'], '%H:%M:%S').time()
+    # Ensure duration exists, default to 60 minutes if not present
+    booking.setdefault('duration', 60)
+    booking.setdefault('places', 1)
+    return booking
+
+
+def booking_to_json(booking):
+    """Convert an in-memory booking into a JSON serialisable dict."""
+    record = dict(booking)
+    if isinstance(record['date'], date):
+        record['date'] = record['date'].isoformat()
+    if isinstance(record['time'], time):
+        record['time'] = record['time'].isoformat()
+    return record
+
+
+class BookingJournal:
+    """
+    File persistence for the booking store.
+
+    Bookings are kept in a JSON snapshot (`path`) plus an append-only journal
+    (`journal_path`) with one JSON line per add/delete/expire event.
+    """
+
+    def __init__(self, path, journal_path=None, compact_every=COMPACT_EVERY):
+        self.path = path
+        self.journal_path = journal_path or f"{path}.journal"
+        self.compact_every = compact_every
+        self._journal_entries = 0
+
+    def load(self):
+        """Return the snapshot records and the journal events written since."""
+        try:
+            with open(self.path, 'r') as file:
+                records = json.load(file) or []
+        except FileNotFoundError:
+            logging.info("Bookings file not found. Starting with an empty store.")
+            records = []
+        except json.JSONDecodeError:
+            logging.error("Error decoding JSON from bookings file. Starting with an empty store.")
+            records = []
+
+        try:
+            with open(self.journal_path, 'r') as file:
+                lines = file.readlines()
+        except FileNotFoundError:
+            lines = []
+
+        events = []
+        for line_number, line in enumerate(lines, 1):
+            try:
+                events.append(json.loads(line))
+            except json.JSONDecodeError:
+                # A crash in the middle of an append leaves a partial last line
+                logging.error(f"Skipping corrupted journal entry at line {line_number}")
+        self._journal_entries = len(lines)
+        return records, events
+
+    def needs_compaction(self):
+        return self._journal_entries > 0
+
+    def append(self, events):
+        """Append events to the journal. Returns True once the journal should be compacted."""
+        with open(self.journal_path, 'a') as file:
+            file.write(''.join(json.dumps(event, default=str) + '\n' for event in events))
+            file.flush()
+        self._journal_entries += len(events)
+        return self._journal_entries >= self.compact_every
+
+    def compact(self, bookings):
+        """Write all bookings into a new snapshot and truncate the journal."""
+        atomic_write(self.path, json.dumps([booking_to_json(b) for b in bookings], default=str))
+        with open(self.journal_path, 'w'):
+            pass
+        self._journal_entries = 0
+
+
+class BookingStore:
+    """
+    Process-wide in-memory booking storage.
+
+    Bookings are loaded from disk once and kept in a time-sorted index of
+    (start datetime, booking id) pairs, so overlap, per-day and per-user
+    queries never touch the bookings file. Occupancy is additionally kept in
+    a per-day minute timeline, so availability checks don't depend on the
+    number of bookings.
+
+    End times are kept in a min-heap, so expiring bookings only touches the
+    bookings that actually ended.
+
+    Every mutation is handed to the persistence backend as a list of
+    add/delete/expire events. By default that is a `BookingJournal` on
+    `path`, which is folded into a new snapshot on startup and every
+    `compact_every` entries. With a `writer` (a `SerialWriter`) the backend
+    calls run on the writer's thread, so mutations return without waiting
+    for the disk; `wait_written` awaits them.
+    """
+
+    def __init__(self, path=None, journal_path=None, compact_every=COMPACT_EVERY, backend=None, writer=None):
+        self.backend = backend or BookingJournal(path, journal_path, compact_every)
+        self.writer = writer
+        self._lock = threading.RLock()
+        self._day_locks = [threading.Lock() for _ in range(DAY_LOCK_STRIPES)]
+        self._bookings = {}
+        self._index = []
+        self._by_user = defaultdict(set)
+        self._timeline = OccupancyTimeline()
+        self._expiry_heap = []
+        self._listeners = []
+        self._max_duration = 0
+        self._next_id = 1
+        # Incremented on every change, so derived data can be cached per version
+        self.version = 0
+
+    def __len__(self):
+        return len(self._bookings)
+
+    def load(self):
+        """(Re)load all bookings from the backend, replaying journaled events."""
+        if self.writer:
+            self.writer.drain_sync()
+        records, events = self.backend.load()
+
+        with self._lock:
+            self._reset()
+            for record in records:
+                self._insert(booking_from_json(record))
+            for event in events:
+                # Replay is idempotent: a snapshot may already contain later journaled events
+                if event['op'] == 'add':
+                    if event['booking'].get('id') not in self._bookings:
+                        self._insert(booking_from_json(event['booking']))
+                elif event['id'] in self._bookings:
+                    self._delete(event['id'])
+
+        if self.backend.needs_compaction():
+            self.compact()
+
+    def subscribe(self, listener):
+        """Call `listener(op, bookings)` after every add/delete/expire."""
+        self._listeners.append(listener)
+
+    def _write(self, func, *args):
+        if self.writer:
+            return self.writer.submit(func, *args)
+        with self._lock:
+            return func(*args)
+
+    def _append_journal(self, events):
+        if events:
+            self._write(self._append_events, events)
+
+    def _append_events(self, events):
+        if self.backend.append(events):
+            self._compact()
+
+    async def wait_written(self):
+        """Wait until all mutations so far have been handed to the backend."""
+        if self.writer:
+            await self.writer.drain()
+
+    def _notify(self, op, bookings):
+        for listener in self._listeners:
+            try:
+                listener(op, bookings)
+            except Exception as e:
+                logging.error(f"Error in booking store listener {listener!r}: {e}")
+
+    def compact(self):
+        """Fold the backend's journal into a new snapshot."""
+        self._write(self._compact)
+
+    def _compact(self):
+        self.backend.compact(self.all())
+
+    def save(self):
+        """Persist all bookings; equivalent to compacting the journal."""
+        self.compact()
+
+    def _reset(self):
+        self.version += 1
+        self._bookings.clear()
+        self._index.clear()
+        self._by_user.clear()
+        self._timeline.clear()
+        self._expiry_heap.clear()
+        self._max_duration = 0
+        self._next_id = 1
+
+    def _insert(self, booking):
+        self.version += 1
+        if booking.get('id') is None:
+            booking['id'] = self._next_id
+        self._next_id = max(self._next_id, booking['id'] + 1)
+        self._bookings[booking['id']] = booking
+        insort(self._index, (booking_start(booking), booking['id']))
+        self._by_user[booking['user_id']].add(booking['id'])
+        self._timeline.add(booking_start(booking), booking['duration'], booking['places'])
+        heapq.heappush(self._expiry_heap, (booking_end(booking), booking['id']))
+        self._max_duration = max(self._max_duration, booking['duration'])
+        return booking
+
+    def _delete(self, booking_id):
+        self.version += 1
+        booking = self._bookings.pop(booking_id)
+        position = bisect_left(self._index, (booking_start(booking), booking_id))
+        del self._index[position]
+        user_ids = self._by_user[booking['user_id']]
+        user_ids.discard(booking_id)
+        if not user_ids:
+            del self._by_user[booking['user_id']]
+        self._timeline.remove(booking_start(booking), booking['duration'], booking['places'])
+        return booking
+
+    def add(self, user_id, booking_datetime, places=1, duration=60):
+        """Add a booking and return it."""
+        with self._lock:
+            booking = self._insert({
+                'user_id': user_id,
+                'date': booking_datetime.date(),
+                'time': booking_datetime.time(),
+                'places': places,
+                'duration': duration,
+            })
+        self._append_journal([{'op': 'add', 'booking': booking_to_json(booking)}])
+        self._notify('add', [dict(booking)])
+        return dict(booking)
+
+    @staticmethod
+    def _stripes_for(start, duration):
+        last_day = (start + timedelta(minutes=max(duration, 1) - 1)).date()
+        day, stripes = start.date(), set()
+        while day <= last_day:
+            stripes.add(day.toordinal() % DAY_LOCK_STRIPES)
+            day += timedelta(days=1)
+        return stripes
+
+    def _locks_for(self, *windows):
+        # Stripes of every day the (start, duration) windows touch, in a fixed order to avoid deadlocks
+        stripes = set().union(*(self._stripes_for(start, duration) for start, duration in windows))
+        return [self._day_locks[stripe] for stripe in sorted(stripes)]
+
+    def try_book(self, user_id, booking_datetime, duration, places, capacity):
+        """
+        Book `places` in [booking_datetime, +duration) if they fit under `capacity`.
+
+        The occupancy check and the insert happen under the locks of the days
+        the window touches, so concurrent attempts can't overbook a slot.
+        Returns a `BookingAttempt`.
+        """
+        locks = self._locks_for((booking_datetime, duration))
+        for lock in locks:
+            lock.acquire()
+        try:
+            available = max(0, capacity - self.max_occupancy(booking_datetime, duration))
+            if available < places:
+                return BookingAttempt(None, available)
+            booking = self.add(user_id, booking_datetime, places, duration)
+            return BookingAttempt(booking['id'], available - places)
+        finally:
+            for lock in reversed(locks):
+                lock.release()
+
+    def try_book_many(self, user_id, requests, capacity, all_or_nothing=False):
+        """
+        Book several (start, duration, places) requests in one go.
+
+        Every request is checked and inserted under the locks of all the days
+        involved, in order, so requests overlapping each other are counted
+        too, and the new bookings reach the backend as a single write. With
+        `all_or_nothing`, nothing is booked unless every request fits.
+        Returns a `BookingAttempt` per request, in order.
+        """
+        locks = self._locks_for(*((start, duration) for start, duration, _ in requests))
+        for lock in locks:
+            lock.acquire()
+        try:
+            attempts, booked = [], []
+            with self._lock:
+                for start, duration, places in requests:
+                    available = max(0, capacity - self.max_occupancy(start, duration))
+                    if available < places:
+                        attempts.append(BookingAttempt(None, available))
+                        continue
+                    booking = self._insert({
+                        'user_id': user_id,
+                        'date': start.date(),
+                        'time': start.time(),
+                        'places': places,
+                        'duration': duration,
+                    })
+                    booked.append(booking)
+                    attempts.append(BookingAttempt(booking['id'], available - places))
+                if all_or_nothing and len(booked) < len(requests):
+                    for booking in booked:
+                        self._delete(booking['id'])
+                    # Report the places that were free before the rolled back requests took theirs
+                    return [BookingAttempt(None, a.available + (places if a.booking_id is not None else 0))
+                            for a, (_, _, places) in zip(attempts, requests)]
+            if booked:
+                self._append_journal([{'op': 'add', 'booking': booking_to_json(b)} for b in booked])
+                self._notify('add', [dict(b) for b in booked])
+            return attempts
+        finally:
+            for lock in reversed(locks):
+                lock.release()
+
+    def remove(self, booking_ids, op='delete'):
+        """Remove bookings by id and return the removed bookings."""
+        with self._lock:
+            removed = [self._delete(booking_id) for booking_id in booking_ids if booking_id in self._bookings]
+        self._append_journal([{'op': op, 'id': booking['id']} for booking in removed])
+        if removed:
+            self._notify(op, [dict(booking) for booking in removed])
+        return removed
+
+    def _pop_stale_expiries(self):
+        # Deleted bookings stay in the heap until they reach the top
+        while self._expiry_heap:
+            end, booking_id = self._expiry_heap[0]
+            booking = self._bookings.get(booking_id)
+            if booking is not None and booking_end(booking) == end:
+                return
+            heapq.heappop(self._expiry_heap)
+
+    def next_expiry(self):
+        """Return the end datetime of the booking that ends first, or None."""
+        self._pop_stale_expiries()
+        return self._expiry_heap[0][0] if self._expiry_heap else None
+
+    def expire(self, now=None):
+        """Remove and return all bookings that have ended by `now`."""
+        now = now or datetime.now()
+        expired = []
+        self._pop_stale_expiries()
+        while self._expiry_heap and self._expiry_heap[0][0] <= now:
+            expired.append(heapq.heappop(self._expiry_heap)[1])
+            self._pop_stale_expiries()
+        return self.remove(expired, op='expire')
+
+    def get(self, booking_id):
+        booking = self._bookings.get(booking_id)
+        return dict(booking) if booking else None
+
+    def all(self):
+        """Return all bookings sorted by start time."""
+        with self._lock:
+            return [dict(self._bookings[booking_id]) for _, booking_id in self._index]
+
+    def between(self, start, end):
+        """Return bookings starting in [start, end), sorted by start time."""
+        lo = bisect_left(self._index, start, key=itemgetter(0))
+        hi = bisect_left(self._index, end, key=itemgetter(0))
+        return [dict(self._bookings[booking_id]) for _, booking_id in self._index[lo:hi]]
+
+    def for_day(self, day):
+        """Return bookings starting on the given date."""
+        day_start = datetime.combine(day, time.min)
+        return self.between(day_start, day_start + timedelta(days=1))
+
+    def for_user(self, user_id):
+        """Return bookings of a user sorted by start time."""
+        bookings = [self._bookings[booking_id] for booking_id in self._by_user.get(user_id, ())]
+        return [dict(b) for b in sorted(bookings, key=lambda b: (booking_start(b), b['id']))]
+
+    def overlapping(self, start, end):
+        """Return bookings whose [start, end) interval intersects [start, end)."""
+        candidates = self.between(start - timedelta(minutes=self._max_duration), end)
+        return [b for b in candidates if booking_end(b) > start]
+
+    def find(self, user_id, booking_date, booking_time, duration):
+        """Return bookings of a user with the given date, time and duration."""
+        return [b for b in self.for_user(user_id)
+                if b['date'] == booking_date and b['time'] == booking_time and b['duration'] == duration]
+
+    def max_occupancy(self, start, duration):
+        """Maximum number of places taken at any minute of [start, start + duration)."""
+        return self._timeline.max_occupancy(start, duration)
+
+    def day_occupancy(self, day):
+        """Return a copy of the per-minute occupancy array of a day."""
+        return self._timeline.day(day)
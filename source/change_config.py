@@ -1,10 +1,8 @@
-import json
+from .config_store import get_config
 
 def is_admin(user_id):
     try:
-        with open('data/config.json', 'r') as config_file:
-            config = json.load(config_file)
-        admin_ids = config.get('admin_ids', [])
+        admin_ids = get_config().get('admin_ids', [])
         return user_id in admin_ids
     except Exception as e:
         print(f"Ошибка проверки статуса администратора: {str(e)}")
@@ -15,23 +13,14 @@ def set_new_password(user_id, new_password):
         return False, "У вас нет прав для смены пароля."
 
     try:
-        with open('data/config.json', 'r') as config_file:
-            config = json.load(config_file)
-        
-        config['verification_password'] = new_password
-        
-        with open('data/config.json', 'w') as config_file:
-            json.dump(config, config_file, indent=2)
-        
+        get_config().update(verification_password=new_password)
         return True, "Пароль успешно обнавлен."
     except Exception as e:
         return False, f"Ошибка обнавления пароля: {str(e)}"
 
 def get_current_password():
     try:
-        with open('data/config.json', 'r') as config_file:
-            config = json.load(config_file)
-        return config.get('verification_password', '')
+        return get_config().get('verification_password', '')
     except Exception as e:
         return None
 
@@ -40,42 +29,27 @@ def set_number_of_concepts(user_id, new_number):
         return False, "У вас нет прав для изменения количества концептов."
 
     try:
-        with open('data/config.json', 'r') as config_file:
-            config = json.load(config_file)
-        
-        config['number_of_concepts'] = new_number
-        
-        with open('data/config.json', 'w') as config_file:
-            json.dump(config, config_file, indent=2)
-        
+        get_config().update(number_of_concepts=new_number)
         return True, f"Количество концептов успешно обновлено на {new_number}."
     except Exception as e:
         return False, f"Ошибка обновления количества концептов: {str(e)}"
 
 def get_number_of_concepts():
     try:
-        with open('data/config.json', 'r') as config_file:
-            config = json.load(config_file)
-        return config.get('number_of_concepts', 6)  # Default to 6 if not set
+        return get_config().get('number_of_concepts', 6)  # Default to 6 if not set
     except Exception as e:
         print(f"Ошибка получения количества концептов: {str(e)}")
         return None
-    
+
 
 def set_gym_closed_period(user_id, start_datetime, end_datetime):
     if not is_admin(user_id):
         return False, "У вас нет прав для изменения периода закрытия зала."
 
     try:
-        with open('data/config.json', 'r') as config_file:
-            config = json.load(config_file)
-
-        config['close_GYM_from'] = start_datetime.isoformat().replace('T',' ')
-        config['close_GYM_until'] = end_datetime.isoformat().replace('T',' ')
-
-        with open('data/config.json', 'w') as config_file:
-            json.dump(config, config_file, indent=2)
-
+        get_config().update(
+            close_GYM_from=start_datetime.isoformat().replace('T',' '),
+            close_GYM_until=end_datetime.isoformat().replace('T',' '))
         return True, "Период закрытия зала успешно обновлен."
     except Exception as e:
         return False, f"Произошла ошибка при обновлении периода закрытия зала: {str(e)}"
@@ -86,26 +60,17 @@ def cancel_gym_closed_period(user_id):
         return False, "У вас нет прав для отмены периода закрытия зала."
 
     try:
-        with open('data/config.json', 'r') as config_file:
-            config = json.load(config_file)
-
-        config['close_GYM_from'] = "NaN"
-        config['close_GYM_until'] = "NaN"
-
-        with open('data/config.json', 'w') as config_file:
-            json.dump(config, config_file, indent=2)
-
+        get_config().update(close_GYM_from="NaN", close_GYM_until="NaN")
         return True, "Период закрытия зала успешно отменен."
     except Exception as e:
         return False, f"Произошла ошибка при отмене периода закрытия зала: {str(e)}"
-    
+
 def get_gym_closed_periods():
     try:
-        with open('data/config.json', 'r') as config_file:
-            config = json.load(config_file)
+        config = get_config()
         start_datetime = config.get('close_GYM_from', "NaN")
         end_datetime = config.get('close_GYM_until', "NaN")
         return start_datetime, end_datetime
     except Exception as e:
         print(f"Ошибка получения периода закрытия зала: {str(e)}")
-        return None, None
\ No newline at end of file
+        return None, None
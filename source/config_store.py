@@ -0,0 +1,55 @@
+import json
+import os
+
+from .file_utils import atomic_write
+
+CONFIG_FILE = 'data/config.json'
+_stores = {}
+
+
+class ConfigStore:
+    """
+    Cached view of a JSON config file.
+
+    The file is parsed once and revalidated on every read with an `os.stat`
+    mtime/size check, so manual edits are still picked up. `update` writes
+    atomically and refreshes the cache in place.
+    """
+
+    def __init__(self, path=CONFIG_FILE, encoding=None):
+        self.path = path
+        self.encoding = encoding
+        self._data = None
+        self._signature = None
+
+    def _stat_signature(self):
+        stat = os.stat(self.path)
+        return stat.st_mtime_ns, stat.st_size
+
+    def data(self):
+        """Return the parsed config. Raises FileNotFoundError/JSONDecodeError like json.load."""
+        signature = self._stat_signature()
+        if signature != self._signature:
+            with open(self.path, 'r', encoding=self.encoding) as config_file:
+                self._data = json.load(config_file)
+            self._signature = signature
+        return self._data
+
+    def get(self, key, default=None):
+        return self.data().get(key, default)
+
+    def update(self, **values):
+        """Set config keys and write the file atomically."""
+        config = dict(self.data())
+        config.update(values)
+        atomic_write(self.path, json.dumps(config, indent=2))
+        self._data = config
+        self._signature = self._stat_signature()
+
+
+def get_config(path=CONFIG_FILE, encoding=None):
+    """Return the shared ConfigStore of a config file."""
+    store = _stores.get(path)
+    if store is None:
+        store = _stores[path] = ConfigStore(path, encoding)
+    return store
@@ -1,61 +1,90 @@
-import pandas as pd
 import json
 import logging
-from datetime import datetime, timedelta, date, time
-import os
-import requests
+from datetime import datetime
+from .async_io import SerialWriter, run_blocking
+from .booking_store import BookingStore
+from .config_store import get_config
+from .report_writer import ReportWriter
+from .message_log import MessageLog
+from .status_store import UserStatusStore
+from .upload_queue import UploadQueue
+from .user_registry import UserRegistry
+from .waitlist import Waitlist
 
 
 BOOKINGS_FILE = 'bookings.json'
-bookings_df = pd.DataFrame(columns=['user_id', 'date', 'time', 'places', 'duration'])
+BOOKINGS_JOURNAL_FILE = 'bookings.journal'
+USERS_FILE = 'users.csv'
+USER_STATUS_FILE = 'data/user_status.json'
+SQLITE_FILE = 'data/bot.sqlite3'
+REPORTS_DIR = 'reports'
+PENDING_UPLOADS_FILE = 'data/pending_uploads.json'
+MESSAGE_LOG_DIR = 'message_logs'
+MESSAGE_LOG_GZIP = False
+WAITLIST_FILE = 'data/waitlist.json'
+_writer = SerialWriter()
+_store = None
+_report_writer = None
+_upload_queue = None
+_user_registry = None
+_status_store = None
+_message_log = None
+_sqlite_backend = None
+_waitlist = None
 
 # Maximum number of bookings per hour
 def get_max_bookings_per_hour(path = 'data/config.json'):
-    with open(path, 'r') as config_file:
-        data = json.load(config_file)
-    return data.get('number_of_concepts', 6)
+    return get_config(path).get('number_of_concepts', 6)
 
 def get_gym_timetable(path = 'data/config.json'):
-    with open(path, 'r') as config_file:
-        data = json.load(config_file)
-    return data.get('GYM_timetable')
+    return get_config(path).get('GYM_timetable')
 
 def get_gym_closed_periods(path = 'data/config.json'):
-    with open(path, 'r') as config_file:
-        data = json.load(config_file)
+    data = get_config(path).data()
     return data.get('close_GYM_from'), data.get('close_GYM_until')
 
 import json
 
 def get_instruction_text(key='book_text', path='data/texts.json'):
+    # Parsed once and re-read only when texts.json changes on disk
     try:
-        with open(path, 'r', encoding='utf-8') as file:
-            data = json.load(file)
-            return data.get(key, "Instruction text not found.")
+        return get_config(path, encoding='utf-8').get(key, "Instruction text not found.")
     except FileNotFoundError:
         return "texts.json file not found."
     except json.JSONDecodeError:
         return "Error decoding JSON from texts.json"
     
+def get_sqlite_backend(path='data/config.json'):
+    """
+    Return the SQLite backend if `"storage_backend": "sqlite"` is set in config.json,
+    otherwise None and the JSON/CSV files are used.
+    """
+    global _sqlite_backend
+    if _sqlite_backend is None:
+        try:
+            config = get_config(path).data()
+        except (FileNotFoundError, json.JSONDecodeError):
+            config = {}
+        if config.get('storage_backend') == 'sqlite':
+            from .sqlite_backend import SQLiteBackend
+            _sqlite_backend = SQLiteBackend(config.get('sqlite_path', SQLITE_FILE))
+        else:
+            _sqlite_backend = False
+    return _sqlite_backend or None
+
+def get_status_store():
+    """Return the process-wide conversation state store, loading it on first use."""
+    global _status_store
+    if _status_store is None:
+        _status_store = UserStatusStore(USER_STATUS_FILE, backend=get_sqlite_backend(), writer=_writer)
+        _status_store.load()
+    return _status_store
+
 def get_user_status(user_id):
-    try:
-        with open('data/user_status.json', 'r') as f:
-            user_statuses = json.load(f)
-        return user_statuses.get(str(user_id), 'default')
-    except FileNotFoundError:
-        return 'default'
+    return get_status_store().get(user_id)
 
 def set_user_status(user_id, status):
-    try:
-        with open('data/user_status.json', 'r') as f:
-            user_statuses = json.load(f)
-    except FileNotFoundError:
-        user_statuses = {}
-    
-    user_statuses[str(user_id)] = status
-    
-    with open('data/user_status.json', 'w') as f:
-        json.dump(user_statuses, f)
+    get_status_store().set(user_id, status)
 
 
 def get_token():
@@ -74,65 +103,59 @@ def get_token():
         return None
 
 
+def get_store():
+    """Return the process-wide booking store, loading it from disk on first use."""
+    if _store is None:
+        load_bookings()
+    return _store
+
+
 def load_bookings():
-    global bookings_df
-    try:
-        with open(BOOKINGS_FILE, 'r') as file:
-            bookings_data = json.load(file)
-            if bookings_data:
-                bookings_df = pd.DataFrame(bookings_data)
-                bookings_df['date'] = pd.to_datetime(bookings_df['date']).dt.date
-                bookings_df['time'] = pd.to_datetime(bookings_df['time'], format='%H:%M:%S').dt.time
-                # Ensure duration column exists, default to 60 minutes if not present
-                if 'duration' not in bookings_df.columns:
-                    bookings_df['duration'] = 60
-            else:
-                bookings_df = pd.DataFrame(columns=['user_id', 'date', 'time', 'places', 'duration'])
-    except FileNotFoundError:
-        logging.info("Bookings file not found. Starting with an empty DataFrame.")
-        bookings_df = pd.DataFrame(columns=['user_id', 'date', 'time', 'places', 'duration'])
-    except json.JSONDecodeError:
-        logging.error("Error decoding JSON from bookings file. Starting with an empty DataFrame.")
-        bookings_df = pd.DataFrame(columns=['user_id', 'date', 'time', 'places', 'duration'])
+    """(Re)load bookings from the snapshot and journal into the store."""
+    global _store
+    if _store is None:
+        _store = BookingStore(BOOKINGS_FILE, BOOKINGS_JOURNAL_FILE, backend=get_sqlite_backend(), writer=_writer)
+    _store.load()
 
 
-def save_bookings(updated_bookings=None):
-    global bookings_df
-    if updated_bookings is not None:
-        bookings_df = pd.DataFrame(updated_bookings)
-        # Ensure duration column exists
-        if 'duration' not in bookings_df.columns:
-            bookings_df['duration'] = 60
-    
-    # Convert date and time objects to strings
-    bookings_data = bookings_df.to_dict('records')
-    for booking in bookings_data:
-        if isinstance(booking['date'], date):
-            booking['date'] = booking['date'].isoformat()
-        if isinstance(booking['time'], time):
-            booking['time'] = booking['time'].isoformat()
-    
-    with open(BOOKINGS_FILE, 'w') as file:
-        json.dump(bookings_data, file, default=str)
+def save_bookings():
+    get_store().save()
+
+
+def try_book(user_id, booking_datetime, duration=60, places=1):
+    """
+    Atomically check capacity and book. Returns a BookingAttempt with the new
+    booking id (None if the places didn't fit) and the places left free.
+    """
+    return get_store().try_book(user_id, booking_datetime, duration, places, get_max_bookings_per_hour())
+
+
+async def try_book_async(user_id, booking_datetime, duration=60, places=1):
+    """`try_book` that returns once a successful booking is on disk."""
+    attempt = try_book(user_id, booking_datetime, duration, places)
+    if attempt.booking_id is not None:
+        await get_store().wait_written()
+    return attempt
+
+
+def try_book_batch(user_id, requests, all_or_nothing=False):
+    """
+    Book several (start, duration, places) requests at once, with one
+    capacity pass and one write. Returns a BookingAttempt per request.
+    """
+    return get_store().try_book_many(user_id, requests, get_max_bookings_per_hour(), all_or_nothing)
+
+
+async def try_book_batch_async(user_id, requests, all_or_nothing=False):
+    """`try_book_batch` that returns once the booked requests are on disk."""
+    attempts = try_book_batch(user_id, requests, all_or_nothing)
+    if any(attempt.booking_id is not None for attempt in attempts):
+        await get_store().wait_written()
+    return attempts
 
 
 def add_booking(user_id, booking_datetime, places=1, duration=60):
-    global bookings_df
-    available_places = get_available_places(booking_datetime, duration)
-    
-    if available_places < places:
-        return False  # Not enough space available
-    
-    new_booking = pd.DataFrame({
-        'user_id': [user_id],
-        'date': [booking_datetime.date()],
-        'time': [booking_datetime.time()], 
-        'places': [places], 
-        'duration': [duration]
-    })
-    bookings_df = pd.concat([bookings_df, new_booking], ignore_index=True)
-    save_bookings()
-    return True
+    return try_book(user_id, booking_datetime, duration, places).booking_id is not None
 
 
 def is_space_available(booking_datetime, duration=60):
@@ -141,341 +164,137 @@ def is_space_available(booking_datetime, duration=60):
 
 
 def get_available_places(booking_datetime, duration=60):
-    remove_old_bookings()
-    global bookings_df
-    if bookings_df.empty:
-        return get_max_bookings_per_hour()
-
-    # Convert date strings to datetime objects
-    bookings_df['start_datetime'] = pd.to_datetime(bookings_df['date'].astype(str) + ' ' + bookings_df['time'].astype(str))
-    
-    # Ensure duration column exists
-    if 'duration' not in bookings_df.columns:
-        bookings_df['duration'] = 60
-    
-    # Calculate end datetime based on duration
-    bookings_df['end_datetime'] = bookings_df.apply(
-        lambda row: row['start_datetime'] + timedelta(minutes=row['duration']), 
-        axis=1
-    )
-
-    # Define the booking time range
-    booking_start = booking_datetime
-    booking_end = booking_start + timedelta(minutes=duration)
-
-    # Find all bookings that overlap with our requested time slot
-    overlapping_bookings = bookings_df[
-        (bookings_df['start_datetime'] < booking_end) & 
-        (bookings_df['end_datetime'] > booking_start)
-    ]
-    
-    if overlapping_bookings.empty:
-        return get_max_bookings_per_hour()
-    
-    # Create a list of all time points where occupancy changes
-    critical_times = []
-    for _, booking in overlapping_bookings.iterrows():
-        # Only consider critical times within our booking window
-        if booking['start_datetime'] >= booking_start and booking['start_datetime'] < booking_end:
-            critical_times.append((booking['start_datetime'], booking['places']))
-        if booking['end_datetime'] > booking_start and booking['end_datetime'] <= booking_end:
-            critical_times.append((booking['end_datetime'], -booking['places']))  # Negative because places are freed
-    
-    # Add the booking start and end times if they're not already included
-    critical_times.append((booking_start, 0))
-    critical_times.append((booking_end, 0))
-    
-    # Sort by time
-    critical_times.sort()
-    
-    # Calculate maximum occupancy during the requested time slot
-    current_occupancy = 0
-    max_occupancy = 0
-    
-    # First, calculate occupancy at booking_start from existing bookings
-    for _, booking in overlapping_bookings.iterrows():
-        if booking['start_datetime'] <= booking_start and booking['end_datetime'] > booking_start:
-            current_occupancy += booking['places']
-    
-    max_occupancy = current_occupancy
-    
-    # Then process all critical points to find maximum occupancy
-    for time, change in critical_times:
-        if time > booking_start:  # Skip the initial state we already calculated
-            current_occupancy += change
-            max_occupancy = max(max_occupancy, current_occupancy)
+    # Maximum occupancy during the requested time slot, from the per-day timeline
+    occupied = get_store().max_occupancy(booking_datetime, duration)
     
     # Calculate available places based on maximum occupancy
-    available_places = get_max_bookings_per_hour() - max_occupancy
+    available_places = get_max_bookings_per_hour() - occupied
     
     return max(0, available_places)  # Ensure we don't return negative values
 
 def get_all_bookings():
-    try:
-        with open('bookings.json', 'r') as f:
-            bookings = json.load(f)
-        
-        if not bookings:
-            logging.info("Bookings file is empty.")
-            return []
-
-        # Convert string dates and times back to datetime objects
-        for booking in bookings:
-            booking['date'] = datetime.strptime(booking['date'], '%Y-%m-%d').date()
-            booking['time'] = datetime.strptime(booking['time'], '%H:%M:%S').time()
-            # Ensure duration exists
-            if 'duration' not in booking:
-                booking['duration'] = 60
-        
-        return bookings
-    except FileNotFoundError:
-        logging.info("Bookings file not found. Creating a new one.")
-        with open('bookings.json', 'w') as f:
-            json.dump([], f)
-        return []
-    except json.JSONDecodeError:
-        logging.error("Error decoding JSON from bookings file. Starting with an empty list.")
-        return []
+    return get_store().all()
+
+def get_day_bookings(day):
+    """
+    Retrieve all bookings starting on a specific day.
+    """
+    return get_store().for_day(day)
+
+def delete_user_bookings(user_id, booking_date, booking_time, duration):
+    """
+    Delete a user's bookings with the given date, time and duration.
+    Returns the deleted bookings.
+    """
+    store = get_store()
+    return store.remove(b['id'] for b in store.find(user_id, booking_date, booking_time, duration))
+
+async def delete_user_bookings_async(user_id, booking_date, booking_time, duration):
+    """`delete_user_bookings` that returns once the deletion is on disk, without blocking the event loop."""
+    deleted = delete_user_bookings(user_id, booking_date, booking_time, duration)
+    await get_store().wait_written()
+    return deleted
+
+def get_waitlist():
+    """Return the process-wide waitlist, loading it on first use."""
+    global _waitlist
+    if _waitlist is None:
+        _waitlist = Waitlist(WAITLIST_FILE, writer=_writer)
+        _waitlist.load()
+    return _waitlist
+
+def get_message_log():
+    """Return the process-wide buffered message log."""
+    global _message_log
+    if _message_log is None:
+        _message_log = MessageLog(MESSAGE_LOG_DIR, compress=MESSAGE_LOG_GZIP)
+    return _message_log
 
 def save_message_to_json(user_id, username, message_text, timestamp):
-    """Save a message to a JSON file."""
-    log_dir = "message_logs"
-    if not os.path.exists(log_dir):
-        os.makedirs(log_dir)
-    
-    filename = f"{log_dir}/message_{timestamp.strftime('%Y%m%d_%H%M%S')}_{user_id}.json"
-    
-    message_data = {
-        "user_id": user_id,
-        "username": username,
-        "message": message_text,
-        "timestamp": timestamp.isoformat()
-    }
-    
-    with open(filename, 'w') as f:
-        json.dump(message_data, f, indent=2)
+    """Buffer a message for the daily JSONL message log."""
+    get_message_log().write(user_id, username, message_text, timestamp)
 
 def get_user_bookings(user_id):
     """
     Retrieve all bookings for a specific user.
     """
-    remove_old_bookings()
-    all_bookings = get_all_bookings()
-    user_bookings = [booking for booking in all_bookings if booking['user_id'] == user_id]
-    return user_bookings
+    return get_store().for_user(user_id)
 
 def remove_old_bookings():
-    bookings = get_all_bookings()
-    if not bookings:
-        return []  # If bookings is empty, just return an empty list
-    
-    current_datetime = datetime.now()
-    updated_bookings = []
-    
-    for booking in bookings:
-        # Get the start datetime
-        start_datetime = datetime.combine(booking['date'], booking['time'])
-        
-        # Calculate end datetime based on duration (default to 60 if not present)
-        duration = booking.get('duration', 60)
-        end_datetime = start_datetime + timedelta(minutes=duration)
-        
-        # Keep booking if end time is in the future
-        if end_datetime > current_datetime:
-            updated_bookings.append(booking)
-        else:
-            add_report(booking)
-    
-    save_bookings(updated_bookings)
-    return updated_bookings
+    store = get_store()
+    add_reports(store.expire(datetime.now()))
+    return store.all()
+
+async def remove_old_bookings_async():
+    """Expire finished bookings and write their reports on the thread pool."""
+    expired = get_store().expire(datetime.now())
+    if expired:
+        await run_blocking(get_report_writer().write, expired, get_user_data())
+
+def get_user_registry():
+    """Return the process-wide user registry, loading it on first use."""
+    global _user_registry
+    if _user_registry is None:
+        _user_registry = UserRegistry(USERS_FILE, backend=get_sqlite_backend(), writer=_writer)
+        _user_registry.load()
+    return _user_registry
+
 
 def get_user_data():
-    try:
-        df = pd.read_csv('users.csv')
-        return dict(zip(df['user_id'], zip(df['name'], df['telegram_link'])))
-    except FileNotFoundError:
-        return {}
-    
+    return get_user_registry().all()
+
 
 def get_user_name(user_id):
-    try:
-        df = pd.read_csv('users.csv')
-        user_row = df[df['user_id'] == user_id]
-        if not user_row.empty:
-            return user_row['name'].iloc[0]
-        else:
-            return None
-    except FileNotFoundError:
-        return None
-    except Exception as e:
-        logging.error(f"Error retrieving user name: {e}")
-        return None
-    
-def add_report(booking):
-    report_dir = "reports"
-    if not os.path.exists(report_dir):
-        os.makedirs(report_dir)
-
-    user_data = get_user_data()
-    user_id = booking['user_id']
-
-    # Format time range
-    booking_time = booking['time']
-    duration = booking.get('duration', 60)
-    start_datetime = datetime.combine(booking['date'], booking_time)
-    end_datetime = start_datetime + timedelta(minutes=duration)
-    time_range = f"{booking_time.strftime('%H:%M')}-{end_datetime.strftime('%H:%M')}"
-
-    # Get user info
-    if user_id in user_data:
-        name, telegram_link = user_data[user_id]
-        user_info = f"{name} ({telegram_link})"
-    else:
-        user_info = f"User ID: {user_id}"
-
-    # Format places and duration
-    places = booking.get('places', 1)
-
-    # Create the formatted entry
-    entry = f"- {time_range}: {user_info} - {places} places, {duration} min\n"
-
-    # Prepare file path
-    booking_day = booking['date'].strftime('%Y-%m-%d')
-    formatted_date = booking['date'].strftime('%d.%m.%Y')
-    filename = f"{report_dir}/{booking_day}.txt"
-
-    # Check if file exists
-    file_exists = os.path.isfile(filename)
-
-    # If we're creating a new file, upload the previous day's report
-    if not file_exists:
-        # Find the most recent report file that's older than the current booking date
-        try:
-            # Get all report files
-            report_files = [f for f in os.listdir(report_dir) if f.endswith('.txt')]
-
-            # Filter files that are older than the current booking date
-            booking_date = booking['date']
-            older_reports = []
-
-            for report_file in report_files:
-                # Extract date from filename (format: YYYY-MM-DD.txt)
-                file_date_str = report_file.split('.')[0]
-                try:
-                    file_date = datetime.strptime(file_date_str, '%Y-%m-%d').date()
-                    if file_date < booking_date:
-                        older_reports.append((file_date, report_file))
-                except ValueError:
-                    # Skip files with invalid date format
-                    continue
-
-            # Sort by date (newest first)
-            older_reports.sort(reverse=True)
-
-            # Upload the most recent older report if it exists
-            if older_reports:
-                most_recent_report = older_reports[0][1]
-                report_path = os.path.join(report_dir, most_recent_report)
-                logging.info(f"Uploading previous report: {report_path}")
-                upload_to_yandex(report_path)
-        except Exception as e:
-            logging.error(f"Error while trying to upload previous report: {e}")
-    
-    # Open file in append mode with UTF-8 encoding
-    with open(filename, 'a', encoding='utf-8') as f:
-        # If file is new, add header
-        if not file_exists:
-            f.write(f"Report on {formatted_date}\n\n")
+    user = get_user_registry().get(user_id)
+    return user[0] if user else None
 
-        # Write the booking entry
-        f.write(entry)
 
-def upload_to_yandex(file_path, yandex_token_path='data/ya_token.json'):
-    """
-    Upload a file to Yandex Disk.
+def get_report_writer():
+    """Return the process-wide daily report writer."""
+    global _report_writer
+    if _report_writer is None:
+        _report_writer = ReportWriter(REPORTS_DIR, on_new_report=upload_to_yandex)
+    return _report_writer
+
+
+def add_reports(bookings):
+    """Write expired bookings to their daily reports, resolving user info once per batch."""
+    bookings = list(bookings)
+    if not bookings:
+        return 0
+    return get_report_writer().write(bookings, get_user_data())
 
-    Args:
-        file_path (str): Path to the file to upload
-        yandex_token_path (str): Path to the file containing Yandex Disk OAuth token
 
-    Returns:
-        bool: True if upload was successful, False otherwise
-    """    
+def add_report(booking):
+    add_reports([booking])
+
+def get_yandex_token(yandex_token_path='data/ya_token.json'):
+    """Read the Yandex Disk OAuth token from its JSON file."""
     try:
-        # Read the Yandex Disk OAuth token from JSON file
         with open(yandex_token_path, 'r') as token_file:
             token_data = json.load(token_file)
+    except FileNotFoundError:
+        logging.error(f"File not found: {yandex_token_path}")
+        return None
+    except json.JSONDecodeError as e:
+        logging.error(f"Error parsing Yandex token file: {e}")
+        return None
 
-        # Extract the token from the JSON structure
-        if isinstance(token_data, dict) and 'yandex_token' in token_data:
-            token = token_data['yandex_token']
-        else:
-            # If it's not a dict with 'yandex_token' key, try using it directly
-            token = token_data
-
-        if not token or not isinstance(token, str):
-            logging.error("Invalid Yandex Disk token format")
-            return False
-
-        # Check if file exists
-        if not os.path.isfile(file_path):
-            logging.error(f"File not found: {file_path}")
-            return False
-
-        # Get filename from path
-        filename = os.path.basename(file_path)
-
-        # Prepare headers with OAuth token
-        headers = {
-            'Authorization': f'OAuth {token}',
-            'Content-Type': 'application/json'
-        }
-
-        # Step 1: Get upload URL
-        get_url_api = 'https://cloud-api.yandex.net/v1/disk/resources/upload'
-        params = {
-            'path': f'/reports/test/{filename}',  # Upload to reports folder on Yandex Disk
-            'overwrite': 'true'
-        }
-
-        response = requests.get(get_url_api, headers=headers, params=params)
-
-        if response.status_code != 200:
-            logging.error(f"Failed to get upload URL: {response.text}")
-            return False
-
-        # Extract the upload URL
-        upload_url = response.json().get('href')
-
-        if not upload_url:
-            logging.error("No upload URL received from Yandex Disk API")
-            return False
-
-        # Step 2: Upload the file
-        with open(file_path, 'rb') as file_to_upload:
-            # Use binary mode for file upload to avoid encoding issues
-            upload_response = requests.put(
-                upload_url, 
-                data=file_to_upload,
-                headers={'Content-Type': 'text/plain; charset=utf-8'}  # Specify UTF-8 encoding
-            )
-
-        if upload_response.status_code == 201 or upload_response.status_code == 200:
-            logging.info(f"Successfully uploaded {filename} to Yandex Disk")
-            return True
-        else:
-            logging.error(f"Failed to upload file: {upload_response.text}")
-            return False
+    # Extract the token from the JSON structure
+    if isinstance(token_data, dict) and 'yandex_token' in token_data:
+        return token_data['yandex_token']
+    # If it's not a dict with 'yandex_token' key, try using it directly
+    return token_data
 
-    except FileNotFoundError as e:
-        logging.error(f"File not found: {e}")
-        return False
-    except json.JSONDecodeError as e:
-        logging.error(f"Error parsing JSON response: {e}")
-        return False
-    except requests.exceptions.RequestException as e:
-        logging.error(f"Request error: {e}")
-        return False
-    except Exception as e:
-        logging.error(f"Unexpected error during Yandex Disk upload: {e}")
-        return False
\ No newline at end of file
+
+def get_upload_queue():
+    """Return the process-wide Yandex Disk upload queue."""
+    global _upload_queue
+    if _upload_queue is None:
+        _upload_queue = UploadQueue(get_yandex_token, PENDING_UPLOADS_FILE)
+    return _upload_queue
+
+
+def upload_to_yandex(file_path):
+    """Queue a file for upload to Yandex Disk; the upload runs in the background."""
+    get_upload_queue().enqueue(file_path)
@@ -1,6 +1,24 @@
 import re
+from collections import namedtuple
 from datetime import datetime, date, timedelta
 
+# A "book `duration` minutes anywhere between `start` and `end`" request
+BookingWindow = namedtuple('BookingWindow', ['start', 'end', 'places', 'duration', 'prefer'])
+
+# A weekly series of `weeks` bookings starting at `starts`
+BookingSeries = namedtuple('BookingSeries', ['starts', 'places', 'duration', 'all_or_nothing'])
+
+SERIES_WORDS = ('каждый', 'каждую', 'каждое', 'every')
+# Trailing word asking to book the series only if every occurrence fits
+ALL_OR_NOTHING_WORDS = ('все', 'всё', 'all')
+# Accepted prefixes of each weekday, Monday first
+WEEKDAYS = [('пн', 'пон', 'mon'), ('вт', 'tue'), ('ср', 'wed'), ('чт', 'чет', 'thu'),
+            ('пт', 'пят', 'fri'), ('сб', 'суб', 'sat'), ('вс', 'вос', 'sun')]
+MAX_SERIES_WEEKS = 26
+
+# Trailing word asking for the least crowded start time instead of the earliest
+LEAST_CROWDED_WORDS = ('свободнее', 'free')
+
 def get_target_date(day, current_date):
     """Calculate the target date based on the given day and current date."""
     if day >= current_date.day:
@@ -121,3 +139,92 @@ def parse_booking_datetime(message_text):
 
     return None, None, None
 
+
+def parse_time_window(window_str):
+    """Parse 'hh:mm-hh:mm' into (start time, end time), or None."""
+    bounds = window_str.split('-')
+    if len(bounds) != 2:
+        return None
+    start, end = parse_time(bounds[0]), parse_time(bounds[1])
+    if start is None or end is None or end <= start:
+        return None
+    return start, end
+
+
+def parse_booking_window(message_text):
+    """
+    Parse '[date] hh:mm-hh:mm [places] [duration] [свободнее]' into a
+    BookingWindow, or None if the message isn't a window request.
+    """
+    current_date = datetime.now().date()
+    parts = message_text.split()
+    prefer = 'earliest'
+    if parts and parts[-1].lower() in LEAST_CROWDED_WORDS:
+        prefer = 'least_crowded'
+        parts = parts[:-1]
+    if not parts:
+        return None
+
+    if '-' in parts[0]:
+        booking_date, window, rest = current_date, parse_time_window(parts[0]), parts[1:]
+    elif len(parts) > 1 and '-' in parts[1]:
+        booking_date, window, rest = parse_date(parts[0], current_date), parse_time_window(parts[1]), parts[2:]
+    else:
+        return None
+    if booking_date is None or window is None or len(rest) > 2:
+        return None
+
+    places = parse_amount(rest[0]) if rest else 1
+    duration = parse_duration(rest[1]) if len(rest) > 1 else 60
+    if places <= 0 or duration <= 0:
+        return None
+    return BookingWindow(datetime.combine(booking_date, window[0]), datetime.combine(booking_date, window[1]),
+                         places, duration, prefer)
+
+
+def parse_weekday(day_str):
+    """Parse a weekday abbreviation ('вт', 'tue', 'вторник') into 0-6, or None."""
+    day_str = day_str.lower()
+    for number, prefixes in enumerate(WEEKDAYS):
+        if any(day_str.startswith(prefix) for prefix in prefixes):
+            return number
+    return None
+
+
+def parse_booking_series(message_text, now=None):
+    """
+    Parse 'каждый вт 19:00 8 [недель] [places] [duration] [все]' into a
+    BookingSeries of weekly start times, or None if the message isn't a
+    series request. The first occurrence is the next such weekday whose
+    start time hasn't passed.
+    """
+    now = now or datetime.now()
+    parts = message_text.split()
+    if len(parts) < 4 or parts[0].lower() not in SERIES_WORDS:
+        return None
+    all_or_nothing = parts[-1].lower() in ALL_OR_NOTHING_WORDS
+    if all_or_nothing:
+        parts = parts[:-1]
+        if len(parts) < 4:
+            return None
+
+    weekday, parsed_time = parse_weekday(parts[1]), parse_time(parts[2])
+    try:
+        weeks = int(parts[3])
+    except ValueError:
+        return None
+    rest = parts[4:]
+    if rest and (rest[0].lower().startswith('нед') or rest[0].lower().startswith('week')):
+        rest = rest[1:]
+    if weekday is None or parsed_time is None or not 0 < weeks <= MAX_SERIES_WEEKS or len(rest) > 2:
+        return None
+
+    places = parse_amount(rest[0]) if rest else 1
+    duration = parse_duration(rest[1]) if len(rest) > 1 else 60
+    if places <= 0 or duration <= 0:
+        return None
+
+    first = datetime.combine(now.date() + timedelta(days=(weekday - now.weekday()) % 7), parsed_time)
+    if first <= now:
+        first += timedelta(weeks=1)
+    return BookingSeries([first + timedelta(weeks=week) for week in range(weeks)], places, duration, all_or_nothing)
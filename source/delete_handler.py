@@ -1,6 +1,6 @@
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import CallbackContext, CallbackQueryHandler
-from .data_handler import get_all_bookings, save_bookings, remove_old_bookings
+from .data_handler import get_user_bookings, delete_user_bookings_async
 from datetime import datetime, timedelta
 from collections import defaultdict
 from .view_handler import translate_date_string, get_concept_form
@@ -11,12 +11,10 @@ logger = get_logger(__name__)
 
 
 async def delete_bookings(update: Update, context: CallbackContext):
-    remove_old_bookings()
     user_id = update.effective_user.id
     user_name = update.effective_user.username or update.effective_user.first_name
     logger.info(f"User {user_id} ({user_name}) requested to delete bookings")
-    bookings = get_all_bookings()
-    user_bookings = [b for b in bookings if b['user_id'] == user_id]
+    user_bookings = get_user_bookings(user_id)
 
     if not user_bookings:
         logger.info(f"User {user_id} ({user_name}) has no active bookings to delete")
@@ -70,37 +68,19 @@ async def delete_booking_callback(update: Update, context: CallbackContext):
     duration = int(callback_parts[3]) if len(callback_parts) > 3 else 60
 
     logger.info(f"User {user_id} ({user_name}) is deleting booking for {date_str} {time_str} with duration {duration} minutes")
-    bookings = get_all_bookings()
 
     # Parse the date and time strings
     date = datetime.strptime(date_str, "%Y-%m-%d").date()
     time = datetime.strptime(time_str, "%H:%M:%S").time()
 
-    # Find the booking to be deleted
-    booking_to_delete = None
-    for b in bookings:
-        if (b['user_id'] == user_id and 
-            b['date'] == date and 
-            b['time'] == time and 
-            b.get('duration', 60) == duration):
-            booking_to_delete = b
-            break
+    # Remove the selected bookings
+    deleted_bookings = await delete_user_bookings_async(user_id, date, time, duration)
 
     # Get the number of places in the booking
-    places_count = booking_to_delete.get('places', 1) if booking_to_delete else 1
-
-    # Remove the selected booking
-    updated_bookings = [b for b in bookings if not (
-        b['user_id'] == user_id and 
-        b['date'] == date and 
-        b['time'] == time and 
-        b.get('duration', 60) == duration
-    )]
+    places_count = deleted_bookings[0].get('places', 1) if deleted_bookings else 1
 
     # Count how many bookings were deleted
-    deleted_count = len(bookings) - len(updated_bookings)
-    # Save the updated bookings
-    save_bookings(updated_bookings)
+    deleted_count = len(deleted_bookings)
 
     booking_datetime = datetime.combine(date, time)
     formatted_date = booking_datetime.strftime('%d/%m (%A)')
@@ -0,0 +1,61 @@
+from datetime import datetime
+from telegram.ext import Application, CallbackContext, JobQueue
+
+from .data_handler import get_store, remove_old_bookings_async
+from .log_handler import get_logger
+
+logger = get_logger(__name__)
+
+EXPIRY_JOB_NAME = 'expire_bookings'
+
+
+def schedule_expiry(job_queue: JobQueue):
+    """(Re)schedule the expiry job for the moment the next booking ends."""
+    for job in job_queue.get_jobs_by_name(EXPIRY_JOB_NAME):
+        job.schedule_removal()
+
+    next_expiry = get_store().next_expiry()
+    if next_expiry is None:
+        return None
+
+    # Naive datetimes are interpreted as UTC by the job queue, so pass a delay instead
+    delay = max(0.0, (next_expiry - datetime.now()).total_seconds())
+    job_queue.run_once(expire_bookings_job, when=delay, name=EXPIRY_JOB_NAME, data=next_expiry)
+    return next_expiry
+
+
+async def expire_bookings_job(context: CallbackContext):
+    """Remove all bookings that have ended, write their reports and wait for the next one."""
+    try:
+        await remove_old_bookings_async()
+    except Exception as e:
+        logger.error(f"Error expiring bookings: {e}")
+    finally:
+        # A failed report write must not stop expiry for good
+        schedule_expiry(context.job_queue)
+
+
+def setup_expiry_scheduler(application: Application):
+    """
+    Expire bookings from a background job instead of on every read.
+
+    The next end time comes from the store's expiry heap, which is rebuilt
+    when the store is loaded, so bookings that ended while the bot was down
+    are expired right after startup. A booking that ends before the currently
+    scheduled one moves the job forward.
+    """
+    job_queue = application.job_queue
+    if job_queue is None:
+        logger.warning("JobQueue is not available, install python-telegram-bot[job-queue]. "
+                       "Expired bookings will not be removed.")
+        return
+
+    def on_store_change(op, bookings):
+        if op != 'add':
+            return
+        scheduled = [job.data for job in job_queue.get_jobs_by_name(EXPIRY_JOB_NAME) if not job.removed]
+        if not scheduled or min(scheduled) > get_store().next_expiry():
+            schedule_expiry(job_queue)
+
+    get_store().subscribe(on_store_change)
+    schedule_expiry(job_queue)
@@ -0,0 +1,23 @@
+import os
+import tempfile
+
+
+def atomic_write(path, text, encoding='utf-8'):
+    """
+    Write text to a file atomically.
+
+    The data is written to a temporary file in the same directory and then
+    moved over the target, so readers never observe a half-written file.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.' + os.path.basename(path) + '.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding=encoding) as file:
+            file.write(text)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
@@ -0,0 +1,202 @@
+from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
+from telegram.ext import CallbackContext, CallbackQueryHandler
+from datetime import datetime, timedelta
+from .data_handler import (
+    get_store, get_gym_timetable, get_gym_closed_periods, get_max_bookings_per_hour, try_book_async,
+    get_user_status, set_user_status)
+from .occupancy import free_places_by_slot
+from .user_handler import require_verification, is_user_verified
+from .view_handler import parse_date, translate_date_string, get_concept_form
+from .log_handler import get_logger
+
+logger = get_logger(__name__)
+
+# Slots offered by /free: one hour long, starting every half hour
+SLOT_DURATION = 60
+SLOT_STEP = 30
+BUTTONS_PER_ROW = 4
+# Number of alternative start times offered when a requested slot is full
+SUGGESTIONS = 3
+# Start times tried inside a flexible booking window
+WINDOW_STEP = 15
+DAYS = ['mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun']
+
+
+def _minute_of_day(value):
+    parsed = datetime.strptime(value, "%H:%M")
+    return parsed.hour * 60 + parsed.minute
+
+
+def opening_hours(day):
+    """Return (open, close) of a day in minutes since midnight, or None if the gym doesn't work."""
+    timetable = get_gym_timetable() or {}
+    open_time = timetable.get(f'{DAYS[day.weekday()]}_open')
+    close_time = timetable.get(f'{DAYS[day.weekday()]}_close')
+    if not open_time or not close_time or open_time == '-1' or close_time == '-1':
+        return None
+    try:
+        return _minute_of_day(open_time), _minute_of_day(close_time)
+    except ValueError:
+        logger.error(f"Invalid time format in gym timetable for {DAYS[day.weekday()]}")
+        return None
+
+
+def closed_period():
+    """Return the (start, end) datetimes of the gym closure, or None."""
+    close_from, close_until = get_gym_closed_periods()
+    if not close_from or not close_until or close_from == "NaN" or close_until == "NaN":
+        return None
+    try:
+        return (datetime.strptime(close_from, "%Y-%m-%d %H:%M:%S"),
+                datetime.strptime(close_until, "%Y-%m-%d %H:%M:%S"))
+    except ValueError:
+        logger.error("Invalid date format in configuration for gym closure period")
+        return None
+
+
+def get_free_slots(day, duration=SLOT_DURATION, step=SLOT_STEP, now=None, align=None):
+    """
+    Free places of every slot of a day's timetable window, as a list of
+    (start datetime, free places). Slots start every `step` minutes from the
+    opening time, or on the grid through `align` (a minute of the day) if
+    given. Slots that have already started or overlap the gym closure are
+    left out.
+    """
+    hours = opening_hours(day)
+    if hours is None:
+        return []
+    open_minute, close_minute = hours
+    if align is not None:
+        open_minute += (align - open_minute) % step
+    now = now or datetime.now()
+    midnight = datetime.combine(day, datetime.min.time())
+    closure = closed_period()
+
+    starts = []
+    for minute in range(open_minute, close_minute - duration + 1, step):
+        start = midnight + timedelta(minutes=minute)
+        end = start + timedelta(minutes=duration)
+        if start <= now or (closure and start < closure[1] and end > closure[0]):
+            continue
+        starts.append(minute)
+
+    free = free_places_by_slot(get_store().day_occupancy(day), get_max_bookings_per_hour(), starts, duration)
+    return [(midnight + timedelta(minutes=minute), int(places)) for minute, places in zip(starts, free)]
+
+
+def find_nearest_slots(booking_datetime, places, duration, k=SUGGESTIONS, now=None):
+    """
+    Return up to `k` start times on the day of `booking_datetime`, nearest to
+    it first, where `places` places are free for `duration` minutes. All
+    candidates come from a single sweep over the day's occupancy.
+    """
+    align = booking_datetime.hour * 60 + booking_datetime.minute
+    slots = get_free_slots(booking_datetime.date(), duration, now=now, align=align)
+    fitting = [start for start, free in slots if free >= places and start != booking_datetime]
+    return sorted(fitting, key=lambda start: (abs(start - booking_datetime), start))[:k]
+
+
+def solve_window(window, now=None):
+    """
+    Pick the start time inside a BookingWindow where `window.places` places
+    are free for the whole duration: the earliest one, or the one with the
+    most free places if `window.prefer` is 'least_crowded'. Returns
+    (start, free places) or None. Every candidate comes from the same
+    sliding-window max over the day's occupancy.
+    """
+    align = window.start.hour * 60 + window.start.minute
+    slots = get_free_slots(window.start.date(), window.duration, step=WINDOW_STEP, now=now, align=align)
+    fitting = [(start, free) for start, free in slots
+               if window.start <= start and start + timedelta(minutes=window.duration) <= window.end
+               and free >= window.places]
+    if not fitting:
+        return None
+    if window.prefer == 'least_crowded':
+        return max(fitting, key=lambda slot: (slot[1], -slot[0].timestamp()))
+    return fitting[0]
+
+
+def slot_callback_data(start, places=1, duration=SLOT_DURATION):
+    return f"free_{start.strftime('%Y-%m-%d_%H:%M')}_{places}_{duration}"
+
+
+def suggestion_keyboard(starts, places, duration):
+    """Inline buttons booking `places` places for `duration` minutes at each of `starts`."""
+    if not starts:
+        return None
+    end = lambda start: (start + timedelta(minutes=duration)).strftime('%H:%M')
+    return InlineKeyboardMarkup([
+        [InlineKeyboardButton(f"{start.strftime('%H:%M')}-{end(start)}",
+                              callback_data=slot_callback_data(start, places, duration))]
+        for start in sorted(starts)])
+
+
+def render_free_slots(day, slots):
+    """Return the text and inline keyboard of the free-slot grid; tapping a free slot books one place."""
+    date_str = translate_date_string(day.strftime('%d/%m (%A)'))
+    if not slots:
+        return f"{date_str}: нет доступного времени для бронирования.", None
+    buttons = [
+        InlineKeyboardButton(f"{start.strftime('%H:%M')} · {places}",
+                             callback_data=slot_callback_data(start))
+        for start, places in slots if places > 0]
+    if not buttons:
+        return f"{date_str}: свободных мест нет.", None
+    keyboard = [buttons[i:i + BUTTONS_PER_ROW] for i in range(0, len(buttons), BUTTONS_PER_ROW)]
+    text = (f"Свободные концепты на {date_str} (слоты по {SLOT_DURATION} минут).\n"
+            f"Нажмите на время, чтобы забронировать 1 концепт.")
+    return text, InlineKeyboardMarkup(keyboard)
+
+
+@require_verification
+async def free_slots_command(update: Update, context: CallbackContext):
+    """Show the free places of every slot of a day (today by default)."""
+    today = datetime.now().date()
+    if context.args:
+        day = parse_date(context.args[0], today)
+        if not day:
+            await update.message.reply_text("Неверный формат даты. Пожалуйста, используйте дд.мм или дд")
+            return
+    else:
+        day = today
+
+    text, reply_markup = render_free_slots(day, get_free_slots(day))
+    await update.message.reply_text(text, reply_markup=reply_markup)
+
+
+async def free_slot_callback(update: Update, context: CallbackContext):
+    query = update.callback_query
+    await query.answer()
+
+    user_id = update.effective_user.id
+    if not is_user_verified(user_id):
+        await query.edit_message_text("Вам необходимо пройти верификацию. Используйте команду /verify.")
+        return
+
+    _, date_str, time_str, places, duration = query.data.split('_')
+    booking_datetime = datetime.strptime(f'{date_str}_{time_str}', '%Y-%m-%d_%H:%M')
+    places, duration = int(places), int(duration)
+    # The buttons may be stale, so the slot is checked again while booking
+    slots = get_free_slots(booking_datetime.date(), duration, align=booking_datetime.hour * 60 + booking_datetime.minute)
+    slot_open = any(start == booking_datetime and free >= places for start, free in slots)
+    attempt = await try_book_async(user_id, booking_datetime, duration, places) if slot_open else None
+
+    if attempt and attempt.booking_id is not None:
+        logger.info(f"User {user_id} booked {booking_datetime} for {duration} minutes from inline buttons")
+        if get_user_status(user_id) == 'wait_book_response':
+            # A suggested slot replaces the partial booking offered for the requested time
+            context.user_data.pop('pending_booking', None)
+            set_user_status(user_id, 'default')
+        duration_text = f" на {duration} минут" if duration != 60 else ""
+        await query.edit_message_text(
+            f"Ваше бронирование на {booking_datetime.strftime('%d.%m в %H:%M')}{duration_text} "
+            f"на {places} {get_concept_form(places)} подтверждено!")
+        return
+
+    reply_markup = suggestion_keyboard(find_nearest_slots(booking_datetime, places, duration), places, duration)
+    text = "Ближайшее свободное время:" if reply_markup else "Свободного времени на этот день не осталось."
+    await query.edit_message_text(f"Извините, это время уже занято.\n\n{text}", reply_markup=reply_markup)
+
+
+def setup_free_handlers(application):
+    application.add_handler(CallbackQueryHandler(free_slot_callback, pattern='^free_'))
@@ -0,0 +1,155 @@
+import asyncio
+import glob
+import gzip
+import json
+import logging
+import os
+import threading
+from collections import defaultdict
+from datetime import datetime
+
+from .async_io import run_blocking
+
+MESSAGE_LOG_DIR = 'message_logs'
+FLUSH_INTERVAL = 5.0
+BATCH_SIZE = 100
+
+
+class MessageLog:
+    """
+    Append-only log of incoming messages, one JSON line per message.
+
+    Messages are buffered in memory and a background task appends them in
+    batches to a file per day (`messages_YYYY-MM-DD.jsonl`, or `.jsonl.gz`
+    with `compress=True`), either every `flush_interval` seconds or as soon as
+    `batch_size` messages are waiting.
+    """
+
+    def __init__(self, log_dir=MESSAGE_LOG_DIR, compress=False, flush_interval=FLUSH_INTERVAL,
+                 batch_size=BATCH_SIZE):
+        self.log_dir = log_dir
+        self.compress = compress
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._wakeup = None
+        self._worker = None
+
+    def path_for(self, day):
+        suffix = '.jsonl.gz' if self.compress else '.jsonl'
+        return os.path.join(self.log_dir, f"messages_{day.strftime('%Y-%m-%d')}{suffix}")
+
+    def write(self, user_id, username, message_text, timestamp):
+        """Buffer one message; it is written by the next flush."""
+        record = {
+            "user_id": user_id,
+            "username": username,
+            "message": message_text,
+            "timestamp": timestamp.isoformat()
+        }
+        with self._lock:
+            self._buffer.append(record)
+            full = len(self._buffer) >= self.batch_size
+        if full and self._wakeup is not None:
+            self._wakeup.set()
+
+    def _open(self, path):
+        if self.compress:
+            # Every append adds a gzip member; readers see one concatenated stream
+            return gzip.open(path, 'at', encoding='utf-8')
+        return open(path, 'a', encoding='utf-8')
+
+    def append_records(self, records):
+        """Append records to their day files, one write per day."""
+        by_day = defaultdict(list)
+        for record in records:
+            by_day[datetime.fromisoformat(record['timestamp']).date()].append(record)
+
+        os.makedirs(self.log_dir, exist_ok=True)
+        for day in sorted(by_day):
+            lines = ''.join(json.dumps(record, ensure_ascii=False) + '\n' for record in by_day[day])
+            with self._open(self.path_for(day)) as f:
+                f.write(lines)
+
+    def flush(self):
+        """Write all buffered messages. Returns the number written."""
+        with self._lock:
+            records, self._buffer = self._buffer, []
+        if records:
+            try:
+                self.append_records(records)
+            except Exception as e:
+                logging.error(f"Error writing message log: {e}")
+                with self._lock:
+                    self._buffer[:0] = records
+                return 0
+        return len(records)
+
+    async def start(self):
+        """Start the background writer."""
+        self._wakeup = asyncio.Event()
+        self._worker = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the background writer and write what is left in the buffer."""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        self._wakeup = None
+        await run_blocking(self.flush)
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await run_blocking(self.flush)
+
+
+def migrate_message_files(log_dir=MESSAGE_LOG_DIR, compress=False, remove=True):
+    """
+    Fold the old per-message `message_*.json` files in `log_dir` into the daily
+    JSONL logs. Returns the number of migrated messages.
+    """
+    message_log = MessageLog(log_dir, compress=compress)
+    paths = sorted(glob.glob(os.path.join(log_dir, 'message_*.json')))
+    records, migrated = [], []
+    for path in paths:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                records.append(json.load(f))
+            migrated.append(path)
+        except (json.JSONDecodeError, UnicodeDecodeError) as e:
+            logging.error(f"Skipping unreadable message file {path}: {e}")
+    records.sort(key=lambda record: record['timestamp'])
+    message_log.append_records(records)
+
+    if remove:
+        for path in migrated:
+            os.remove(path)
+    return len(records)
+
+
+def setup_message_log(application, message_log):
+    """Run the message log writer for the lifetime of the application."""
+    post_init, post_shutdown = application.post_init, application.post_shutdown
+
+    async def start_message_log(app):
+        await message_log.start()
+        if post_init:
+            await post_init(app)
+
+    async def stop_message_log(app):
+        await message_log.stop()
+        if post_shutdown:
+            await post_shutdown(app)
+
+    application.post_init = start_message_log
+    application.post_shutdown = stop_message_log
@@ -0,0 +1,78 @@
+import numpy as np
+from datetime import timedelta
+
+MINUTES_PER_DAY = 24 * 60
+
+
+class OccupancyTimeline:
+    """
+    Per-day occupancy at minute resolution.
+
+    Every day with bookings has one int16 array of 1440 minutes holding the
+    number of places taken at that minute. Adding or removing a booking
+    touches only the minutes it covers, and the maximum occupancy of any
+    window is a max over a slice.
+    """
+
+    def __init__(self):
+        self._days = {}
+
+    def clear(self):
+        self._days.clear()
+
+    def _segments(self, start, duration):
+        """Yield (day, first minute, last minute + 1) pieces of [start, start + duration)."""
+        day = start.date()
+        offset = start.hour * 60 + start.minute
+        remaining = duration
+        while remaining > 0:
+            length = min(remaining, MINUTES_PER_DAY - offset)
+            yield day, offset, offset + length
+            remaining -= length
+            day += timedelta(days=1)
+            offset = 0
+
+    def _apply(self, start, duration, delta):
+        for day, lo, hi in self._segments(start, duration):
+            minutes = self._days.get(day)
+            if minutes is None:
+                minutes = self._days[day] = np.zeros(MINUTES_PER_DAY, dtype=np.int16)
+            minutes[lo:hi] += delta
+            if delta < 0 and not minutes.any():
+                del self._days[day]
+
+    def add(self, start, duration, places):
+        self._apply(start, duration, places)
+
+    def remove(self, start, duration, places):
+        self._apply(start, duration, -places)
+
+    def day(self, day):
+        """Return a copy of the occupancy array of a day."""
+        minutes = self._days.get(day)
+        if minutes is None:
+            return np.zeros(MINUTES_PER_DAY, dtype=np.int16)
+        return minutes.copy()
+
+    def max_occupancy(self, start, duration):
+        """Maximum number of places taken at any minute of [start, start + duration)."""
+        occupied = 0
+        for day, lo, hi in self._segments(start, duration):
+            minutes = self._days.get(day)
+            if minutes is not None:
+                occupied = max(occupied, int(minutes[lo:hi].max()))
+        return occupied
+
+
+def free_places_by_slot(minutes, capacity, slot_starts, duration):
+    """
+    Free places of every slot [start, start + duration) of a day, given the
+    day's per-minute occupancy. All slots are answered from one pass of
+    sliding-window maxima over the occupancy array.
+    """
+    minutes = np.asarray(minutes, dtype=np.int64)
+    slot_starts = np.asarray(slot_starts, dtype=np.int64)
+    if not len(slot_starts):
+        return np.zeros(0, dtype=np.int64)
+    window_max = np.lib.stride_tricks.sliding_window_view(minutes, duration).max(axis=1)
+    return np.maximum(0, capacity - window_max[slot_starts])
@@ -0,0 +1,176 @@
+import asyncio
+import logging
+import time
+
+from telegram.error import RetryAfter
+from telegram.ext import BaseRateLimiter
+
+from .config_store import get_config
+
+# Incoming commands: burst size and refill rate (tokens per second)
+USER_BURST = 5
+USER_RATE = 0.5
+GLOBAL_BURST = 60
+GLOBAL_RATE = 20.0
+# At most one "too many requests" reply per user every NOTICE_INTERVAL seconds
+NOTICE_INTERVAL = 10.0
+# Keep at most this many per-user buckets; full (idle) buckets are dropped first
+MAX_TRACKED_USERS = 10000
+
+# Outgoing API calls: Telegram allows ~30 messages/s overall and 20/min per group
+OUTGOING_RATE = 30.0
+GROUP_RATE = 20 / 60
+GROUP_BURST = 20
+MAX_RETRIES = 2
+
+
+class TokenBucket:
+    """Token bucket holding up to `burst` tokens, refilled at `rate` tokens per second."""
+
+    def __init__(self, rate, burst, clock=time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self.clock = clock
+        self.tokens = burst
+        self.updated = clock()
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def is_full(self):
+        self._refill()
+        return self.tokens >= self.burst
+
+    def try_acquire(self, tokens=1):
+        """Take tokens if available. Returns False without waiting otherwise."""
+        self._refill()
+        if self.tokens >= tokens:
+            self.tokens -= tokens
+            return True
+        return False
+
+    def delay(self, tokens=1):
+        """Seconds until `tokens` tokens will be available."""
+        self._refill()
+        return max(0.0, (tokens - self.tokens) / self.rate)
+
+    async def acquire(self, tokens=1):
+        """Wait until tokens are available and take them."""
+        while not self.try_acquire(tokens):
+            await asyncio.sleep(self.delay(tokens))
+
+
+class CommandRateLimiter:
+    """
+    Per-user and global token buckets for incoming commands.
+
+    `allow` is a couple of dict lookups and float operations, so rejected
+    requests cost almost nothing. `should_notify` says whether a rejected user
+    should be told about it, at most once per `notice_interval`.
+    """
+
+    def __init__(self, user_rate=USER_RATE, user_burst=USER_BURST, global_rate=GLOBAL_RATE,
+                 global_burst=GLOBAL_BURST, notice_interval=NOTICE_INTERVAL, clock=time.monotonic):
+        self.user_rate = user_rate
+        self.user_burst = user_burst
+        self.notice_interval = notice_interval
+        self.clock = clock
+        self.global_bucket = TokenBucket(global_rate, global_burst, clock)
+        self._users = {}
+        self._notices = {}
+
+    def _user_bucket(self, user_id):
+        bucket = self._users.get(user_id)
+        if bucket is None:
+            if len(self._users) >= MAX_TRACKED_USERS:
+                self._users = {uid: b for uid, b in self._users.items() if not b.is_full()}
+            bucket = self._users[user_id] = TokenBucket(self.user_rate, self.user_burst, self.clock)
+        return bucket
+
+    def allow(self, user_id):
+        bucket = self._user_bucket(user_id)
+        if bucket.delay() > 0 or not self.global_bucket.try_acquire():
+            return False
+        return bucket.try_acquire()
+
+    def should_notify(self, user_id):
+        now = self.clock()
+        if now - self._notices.get(user_id, float('-inf')) < self.notice_interval:
+            return False
+        if len(self._notices) >= MAX_TRACKED_USERS:
+            # Notices older than the interval no longer suppress anything
+            self._notices = {uid: t for uid, t in self._notices.items() if now - t < self.notice_interval}
+        self._notices[user_id] = now
+        return True
+
+
+_command_limiter = None
+
+
+def get_command_limiter():
+    """Return the process-wide command limiter, configured from `rate_limit` in config.json."""
+    global _command_limiter
+    if _command_limiter is None:
+        try:
+            settings = get_config().get('rate_limit', {})
+        except Exception as e:
+            logging.error(f"Error reading rate limit settings, using defaults: {e}")
+            settings = {}
+        _command_limiter = CommandRateLimiter(
+            user_rate=settings.get('user_rate', USER_RATE),
+            user_burst=settings.get('user_burst', USER_BURST),
+            global_rate=settings.get('global_rate', GLOBAL_RATE),
+            global_burst=settings.get('global_burst', GLOBAL_BURST),
+            notice_interval=settings.get('notice_interval', NOTICE_INTERVAL))
+    return _command_limiter
+
+
+class FloodControlRateLimiter(BaseRateLimiter):
+    """
+    Rate limiter for outgoing Bot API calls.
+
+    Every request takes a token from a global bucket (30/s), and requests to
+    group chats also from that group's bucket (20/min), so mass replies are
+    delayed instead of being rejected by Telegram. If Telegram still answers
+    with RetryAfter, the request is retried after the requested delay.
+    """
+
+    def __init__(self, overall_rate=OUTGOING_RATE, group_rate=GROUP_RATE, group_burst=GROUP_BURST,
+                 max_retries=MAX_RETRIES):
+        self.overall_rate = overall_rate
+        self.group_rate = group_rate
+        self.group_burst = group_burst
+        self.max_retries = max_retries
+        self._overall = None
+        self._groups = {}
+
+    async def initialize(self):
+        self._overall = TokenBucket(self.overall_rate, self.overall_rate)
+
+    async def shutdown(self):
+        self._groups.clear()
+
+    async def _wait_for_slot(self, chat_id):
+        if isinstance(chat_id, int) and chat_id < 0:
+            bucket = self._groups.get(chat_id)
+            if bucket is None:
+                bucket = self._groups[chat_id] = TokenBucket(self.group_rate, self.group_burst)
+            await bucket.acquire()
+        await self._overall.acquire()
+
+    async def process_request(self, callback, args, kwargs, endpoint, data, rate_limit_args):
+        if endpoint == 'getUpdates':
+            return await callback(*args, **kwargs)
+
+        for attempt in range(self.max_retries + 1):
+            await self._wait_for_slot(data.get('chat_id'))
+            try:
+                return await callback(*args, **kwargs)
+            except RetryAfter as e:
+                if attempt == self.max_retries:
+                    raise
+                retry_after = e.retry_after.total_seconds() if hasattr(e.retry_after, 'total_seconds') else e.retry_after
+                logging.warning(f"Flood control on {endpoint}, retrying in {retry_after} seconds")
+                await asyncio.sleep(retry_after)
@@ -0,0 +1,49 @@
+from collections import OrderedDict
+
+RENDER_CACHE_SIZE = 256
+
+
+class RenderCache:
+    """
+    Bounded LRU cache of rendered messages.
+
+    Keys include the versions of the data the message was rendered from, so
+    entries never need to be invalidated: after a change the key simply
+    doesn't match any more and the stale entry ages out.
+    """
+
+    def __init__(self, maxsize=RENDER_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get_or_render(self, key, render):
+        """Return the cached value of `key`, calling `render()` on a miss."""
+        try:
+            value = self._entries[key]
+        except KeyError:
+            self.misses += 1
+            value = self._entries[key] = render()
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+            return value
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return value
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self):
+        """Return hit/miss counters and the hit rate."""
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+            'size': len(self._entries),
+        }
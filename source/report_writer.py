@@ -0,0 +1,94 @@
+import logging
+import os
+from bisect import bisect_left, insort
+from collections import defaultdict
+from datetime import datetime
+
+from .booking_store import booking_start, booking_end
+
+
+def format_report_entry(booking, user_data):
+    """Format one expired booking as a report line."""
+    user_id = booking['user_id']
+    duration = booking.get('duration', 60)
+    time_range = f"{booking_start(booking).strftime('%H:%M')}-{booking_end(booking).strftime('%H:%M')}"
+
+    if user_id in user_data:
+        name, telegram_link = user_data[user_id]
+        user_info = f"{name} ({telegram_link})"
+    else:
+        user_info = f"User ID: {user_id}"
+
+    return f"- {time_range}: {user_info} - {booking.get('places', 1)} places, {duration} min\n"
+
+
+class ReportWriter:
+    """
+    Writes expired bookings into daily report files (`reports/YYYY-MM-DD.txt`).
+
+    Bookings are written in batches with one append per report day. The dates
+    of existing reports are listed once and then kept in a sorted in-memory
+    index, so starting a new day's report doesn't scan the directory to find
+    the previous one. `on_new_report(path)` is called with that previous report
+    when a new day's file is created.
+    """
+
+    def __init__(self, report_dir='reports', on_new_report=None):
+        self.report_dir = report_dir
+        self.on_new_report = on_new_report
+        self._dates = None
+
+    def _report_path(self, report_date):
+        return os.path.join(self.report_dir, f"{report_date.strftime('%Y-%m-%d')}.txt")
+
+    def _load_dates(self):
+        if self._dates is not None:
+            return self._dates
+        os.makedirs(self.report_dir, exist_ok=True)
+        dates = []
+        for report_file in os.listdir(self.report_dir):
+            if not report_file.endswith('.txt'):
+                continue
+            try:
+                dates.append(datetime.strptime(report_file[:-len('.txt')], '%Y-%m-%d').date())
+            except ValueError:
+                # Skip files with invalid date format
+                continue
+        self._dates = sorted(dates)
+        return self._dates
+
+    def previous_report(self, report_date):
+        """Return the path of the most recent report older than `report_date`, or None."""
+        dates = self._load_dates()
+        position = bisect_left(dates, report_date)
+        return self._report_path(dates[position - 1]) if position else None
+
+    def write(self, bookings, user_data):
+        """Append bookings to their day reports, one write per day. Returns the number written."""
+        by_day = defaultdict(list)
+        for booking in bookings:
+            by_day[booking['date']].append(booking)
+
+        dates = self._load_dates()
+        for report_date in sorted(by_day):
+            day_bookings = sorted(by_day[report_date], key=lambda b: (booking_start(b), b['user_id']))
+            lines = [format_report_entry(booking, user_data) for booking in day_bookings]
+
+            index = bisect_left(dates, report_date)
+            is_new = index == len(dates) or dates[index] != report_date
+            if is_new:
+                previous = self.previous_report(report_date)
+                lines.insert(0, f"Report on {report_date.strftime('%d.%m.%Y')}\n\n")
+
+            with open(self._report_path(report_date), 'a', encoding='utf-8') as f:
+                f.write(''.join(lines))
+
+            if is_new:
+                insort(dates, report_date)
+                if previous and self.on_new_report:
+                    try:
+                        logging.info(f"Uploading previous report: {previous}")
+                        self.on_new_report(previous)
+                    except Exception as e:
+                        logging.error(f"Error while trying to upload previous report: {e}")
+        return sum(len(day_bookings) for day_bookings in by_day.values())
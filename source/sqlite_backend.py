@@ -0,0 +1,191 @@
+import csv
+import json
+import logging
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+from .booking_store import BookingStore, booking_end, booking_from_json
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS bookings (
+    id INTEGER PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    date TEXT NOT NULL,
+    time TEXT NOT NULL,
+    places INTEGER NOT NULL DEFAULT 1,
+    duration INTEGER NOT NULL DEFAULT 60,
+    end_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_bookings_date_time ON bookings (date, time);
+CREATE INDEX IF NOT EXISTS idx_bookings_user_id ON bookings (user_id);
+CREATE INDEX IF NOT EXISTS idx_bookings_end_at ON bookings (end_at);
+
+CREATE TABLE IF NOT EXISTS users (
+    user_id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    telegram_link TEXT NOT NULL DEFAULT ''
+);
+
+CREATE TABLE IF NOT EXISTS user_status (
+    user_id INTEGER PRIMARY KEY,
+    status TEXT NOT NULL
+);
+"""
+
+
+def _booking_row(booking):
+    return {
+        'id': booking['id'],
+        'user_id': booking['user_id'],
+        'date': booking['date'].isoformat(),
+        'time': booking['time'].isoformat(),
+        'places': booking['places'],
+        'duration': booking['duration'],
+        'end_at': booking_end(booking).isoformat(sep=' '),
+    }
+
+
+class SQLiteBackend:
+    """
+    SQLite storage for bookings, users and conversation state.
+
+    The database runs in WAL mode so readers never block the writer, and
+    every mutation is a single transaction. It also implements the
+    persistence interface of `BookingStore` (load/append/compact).
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    @contextmanager
+    def transaction(self):
+        with self._lock:
+            self.connection.execute('BEGIN IMMEDIATE')
+            try:
+                yield self.connection
+            except BaseException:
+                self.connection.execute('ROLLBACK')
+                raise
+            self.connection.execute('COMMIT')
+
+    def _query(self, sql, params=()):
+        with self._lock:
+            return self.connection.execute(sql, params).fetchall()
+
+    # Booking store persistence
+
+    def load(self):
+        rows = self._query('SELECT id, user_id, date, time, places, duration FROM bookings ORDER BY date, time, id')
+        return [dict(row) for row in rows], []
+
+    def needs_compaction(self):
+        return False
+
+    def append(self, events):
+        with self.transaction() as connection:
+            for event in events:
+                if event['op'] == 'add':
+                    connection.execute(
+                        'INSERT OR REPLACE INTO bookings (id, user_id, date, time, places, duration, end_at) '
+                        'VALUES (:id, :user_id, :date, :time, :places, :duration, :end_at)',
+                        _booking_row(booking_from_json(event['booking'])))
+                else:
+                    connection.execute('DELETE FROM bookings WHERE id = ?', (event['id'],))
+        return False
+
+    def compact(self, bookings):
+        pass
+
+    def overlapping(self, start, end):
+        """Return bookings whose interval intersects [start, end), using the date/time and end indexes."""
+        rows = self._query(
+            'SELECT id, user_id, date, time, places, duration FROM bookings '
+            'WHERE end_at > :start AND (date < :end_date OR (date = :end_date AND time < :end_time)) '
+            'ORDER BY date, time, id',
+            {'start': start.isoformat(sep=' '), 'end_date': end.date().isoformat(), 'end_time': end.time().isoformat()})
+        return [booking_from_json(dict(row)) for row in rows]
+
+    # Users
+
+    def is_user_verified(self, user_id):
+        return bool(self._query('SELECT 1 FROM users WHERE user_id = ?', (user_id,)))
+
+    def get_user(self, user_id):
+        rows = self._query('SELECT name, telegram_link FROM users WHERE user_id = ?', (user_id,))
+        return (rows[0]['name'], rows[0]['telegram_link']) if rows else None
+
+    def get_users(self):
+        rows = self._query('SELECT user_id, name, telegram_link FROM users')
+        return {row['user_id']: (row['name'], row['telegram_link']) for row in rows}
+
+    def add_user(self, user_id, name, telegram_link):
+        with self.transaction() as connection:
+            connection.execute('INSERT OR REPLACE INTO users (user_id, name, telegram_link) VALUES (?, ?, ?)',
+                               (user_id, name, telegram_link or ''))
+
+    def rename_user(self, user_id, new_name):
+        with self.transaction() as connection:
+            return connection.execute('UPDATE users SET name = ? WHERE user_id = ?', (new_name, user_id)).rowcount > 0
+
+    # Conversation state
+
+    def get_user_status(self, user_id):
+        rows = self._query('SELECT status FROM user_status WHERE user_id = ?', (user_id,))
+        return rows[0]['status'] if rows else 'default'
+
+    def all_user_statuses(self):
+        return {row['user_id']: row['status'] for row in self._query('SELECT user_id, status FROM user_status')}
+
+    def set_user_status(self, user_id, status):
+        with self.transaction() as connection:
+            connection.execute('INSERT OR REPLACE INTO user_status (user_id, status) VALUES (?, ?)', (user_id, status))
+
+    # Import
+
+    def import_from_files(self, bookings_path='bookings.json', journal_path='bookings.journal',
+                          users_path='users.csv', status_path='data/user_status.json'):
+        """
+        One-shot import of the JSON/CSV data files into the database.
+
+        Returns a dict with the number of imported bookings, users and statuses.
+        """
+        store = BookingStore(bookings_path, journal_path)
+        store.load()
+        bookings = store.all()
+
+        users = []
+        try:
+            with open(users_path, newline='', encoding='utf-8') as file:
+                for row in csv.DictReader(file):
+                    users.append((int(row['user_id']), row['name'], row.get('telegram_link') or ''))
+        except FileNotFoundError:
+            logging.info(f"{users_path} not found, no users imported.")
+
+        try:
+            with open(status_path, 'r') as file:
+                statuses = [(int(user_id), status) for user_id, status in json.load(file).items()]
+        except FileNotFoundError:
+            logging.info(f"{status_path} not found, no user statuses imported.")
+            statuses = []
+
+        with self.transaction() as connection:
+            connection.executemany(
+                'INSERT OR REPLACE INTO bookings (id, user_id, date, time, places, duration, end_at) '
+                'VALUES (:id, :user_id, :date, :time, :places, :duration, :end_at)',
+                [_booking_row(b) for b in bookings])
+            connection.executemany(
+                'INSERT OR REPLACE INTO users (user_id, name, telegram_link) VALUES (?, ?, ?)', users)
+            connection.executemany(
+                'INSERT OR REPLACE INTO user_status (user_id, status) VALUES (?, ?)', statuses)
+
+        return {'bookings': len(bookings), 'users': len(users), 'user_statuses': len(statuses)}
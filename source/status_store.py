@@ -0,0 +1,122 @@
+import json
+import logging
+import os
+import threading
+
+from .async_io import run_blocking
+from .file_utils import atomic_write
+
+USER_STATUS_FILE = 'data/user_status.json'
+FLUSH_JOB_NAME = 'flush_user_status'
+FLUSH_DELAY = 5
+
+
+class UserStatusStore:
+    """
+    In-memory conversation state of every user.
+
+    Statuses live in a dict, so reading or changing a user's state never
+    touches the disk. Changes mark the store dirty and call `on_dirty`, which
+    schedules a debounced `flush`; the flush writes one atomic snapshot of
+    the whole map, so concurrent changes can't overwrite each other. With a
+    `backend` (the SQLite backend) all statuses are read on load and changes
+    are written through to the database, on the `writer`'s thread if one is
+    given.
+    """
+
+    def __init__(self, path=USER_STATUS_FILE, backend=None, writer=None):
+        self.path = path
+        self.backend = backend
+        self.writer = writer
+        self.on_dirty = None
+        self._statuses = {}
+        self._dirty = False
+        self._lock = threading.Lock()
+
+    def load(self):
+        """(Re)load statuses from the JSON file."""
+        if self.backend:
+            statuses = self.backend.all_user_statuses()
+            with self._lock:
+                self._statuses = statuses
+            return
+        try:
+            with open(self.path, 'r') as f:
+                statuses = {int(user_id): status for user_id, status in json.load(f).items()}
+        except FileNotFoundError:
+            statuses = {}
+        except (json.JSONDecodeError, ValueError):
+            logging.error("Error decoding JSON from user status file. Starting with empty statuses.")
+            statuses = {}
+        with self._lock:
+            self._statuses = statuses
+            self._dirty = False
+
+    @property
+    def dirty(self):
+        return self._dirty
+
+    def get(self, user_id):
+        return self._statuses.get(user_id) or 'default'
+
+    def set(self, user_id, status):
+        if self.backend:
+            with self._lock:
+                if self._statuses.get(user_id) == status:
+                    return
+                self._statuses[user_id] = status
+            if self.writer:
+                self.writer.submit(self.backend.set_user_status, user_id, status)
+            else:
+                self.backend.set_user_status(user_id, status)
+            return
+        with self._lock:
+            if self._statuses.get(user_id) == status:
+                return
+            self._statuses[user_id] = status
+            self._dirty = True
+        if self.on_dirty:
+            self.on_dirty()
+
+    def flush(self):
+        """Write the statuses to disk if they changed since the last flush."""
+        with self._lock:
+            if not self._dirty:
+                return False
+            snapshot = json.dumps({str(user_id): status for user_id, status in self._statuses.items()})
+            self._dirty = False
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            atomic_write(self.path, snapshot)
+        except Exception:
+            with self._lock:
+                self._dirty = True
+            raise
+        return True
+
+
+def setup_status_flush(application, status_store, delay=FLUSH_DELAY):
+    """Flush user statuses `delay` seconds after a change, and on shutdown."""
+    post_shutdown = application.post_shutdown
+
+    async def flush_job(context):
+        await run_blocking(status_store.flush)
+
+    async def flush_on_shutdown(app):
+        await run_blocking(status_store.flush)
+        if post_shutdown:
+            await post_shutdown(app)
+
+    application.post_shutdown = flush_on_shutdown
+
+    job_queue = application.job_queue
+    if job_queue is None:
+        logging.warning("JobQueue is not available, user statuses are written on every change.")
+        status_store.on_dirty = status_store.flush
+        return
+
+    def schedule_flush():
+        if not job_queue.get_jobs_by_name(FLUSH_JOB_NAME):
+            job_queue.run_once(flush_job, when=delay, name=FLUSH_JOB_NAME)
+
+    status_store.on_dirty = schedule_flush
@@ -0,0 +1,73 @@
+from telegram.constants import MessageLimit
+
+MAX_MESSAGE_LENGTH = MessageLimit.MAX_TEXT_LENGTH
+
+
+def _safe_split_points(text):
+    """Yield positions after whitespace that are outside HTML tags, elements and entities."""
+    in_tag = in_entity = False
+    tag_start = open_elements = 0
+    for i, char in enumerate(text):
+        if in_tag:
+            if char == '>':
+                in_tag = False
+                if text[tag_start + 1] == '/':
+                    open_elements -= 1
+                elif text[i - 1] != '/':
+                    open_elements += 1
+        elif in_entity:
+            if char == ';' or char.isspace():
+                in_entity = False
+        elif char == '<':
+            in_tag = True
+            tag_start = i
+        elif char == '&':
+            in_entity = True
+        elif char.isspace() and open_elements == 0:
+            yield i + 1
+
+
+def split_html(text, limit=MAX_MESSAGE_LENGTH):
+    """
+    Split text into pieces of at most `limit` characters, preferring line
+    breaks, then spaces, and never cutting inside a tag, an element such as
+    <a>...</a> or an entity such as &amp;.
+    """
+    pieces = []
+    while len(text) > limit:
+        best_newline = best_space = None
+        for point in _safe_split_points(text):
+            if point > limit:
+                break
+            if text[point - 1] == '\n':
+                best_newline = point
+            else:
+                best_space = point
+        cut = best_newline or best_space
+        if not cut:
+            # No safe point at all (e.g. one huge link): a hard cut is the only option
+            cut = limit
+        pieces.append(text[:cut])
+        text = text[cut:]
+    if text:
+        pieces.append(text)
+    return pieces
+
+
+def pack_messages(blocks, limit=MAX_MESSAGE_LENGTH):
+    """
+    Pack text blocks into as few messages of at most `limit` characters as
+    possible, keeping blocks whole unless a single block is over the limit.
+    Works in one pass over a generator of blocks.
+    """
+    current, length = [], 0
+    for block in blocks:
+        pieces = split_html(block, limit) if len(block) > limit else [block]
+        for piece in pieces:
+            if length + len(piece) > limit and current:
+                yield ''.join(current)
+                current, length = [], 0
+            current.append(piece)
+            length += len(piece)
+    if current:
+        yield ''.join(current)
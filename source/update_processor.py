@@ -0,0 +1,62 @@
+import asyncio
+import sys
+
+from telegram.ext import BaseUpdateProcessor
+
+# Upper bound on updates handled at the same time across all users
+MAX_CONCURRENT_UPDATES = 64
+
+
+class PerUserUpdateProcessor(BaseUpdateProcessor):
+    """
+    Processes updates of different users concurrently, and updates of the same
+    user one after another in the order they arrived.
+
+    Conversation state (verification, pending bookings, closing the gym) is
+    kept per user, so a user's messages must never overtake each other, while
+    other users shouldn't have to wait for them.
+    """
+
+    def __init__(self, max_concurrent_updates=MAX_CONCURRENT_UPDATES):
+        # PTB takes its semaphore before do_process_update, so updates queued
+        # behind a user's lock would hold its slots; the real bound is taken
+        # only once the user's turn has come
+        super().__init__(sys.maxsize)
+        self._running = asyncio.Semaphore(max_concurrent_updates)
+        self._user_locks = {}
+        self._waiters = {}
+
+    @staticmethod
+    def _user_key(update):
+        user = getattr(update, 'effective_user', None)
+        if user is not None:
+            return user.id
+        chat = getattr(update, 'effective_chat', None)
+        return ('chat', chat.id) if chat is not None else None
+
+    async def do_process_update(self, update, coroutine):
+        key = self._user_key(update)
+        if key is None:
+            async with self._running:
+                await coroutine
+            return
+
+        lock = self._user_locks.get(key)
+        if lock is None:
+            lock = self._user_locks[key] = asyncio.Lock()
+        self._waiters[key] = self._waiters.get(key, 0) + 1
+        try:
+            async with lock, self._running:
+                await coroutine
+        finally:
+            self._waiters[key] -= 1
+            if not self._waiters[key]:
+                # Forget idle users so the lock table doesn't grow with every user ever seen
+                del self._waiters[key]
+                del self._user_locks[key]
+
+    async def initialize(self):
+        pass
+
+    async def shutdown(self):
+        pass
@@ -0,0 +1,212 @@
+import asyncio
+import json
+import logging
+import os
+import threading
+
+import httpx
+
+from .async_io import run_blocking
+from .file_utils import atomic_write
+
+YANDEX_UPLOAD_API = 'https://cloud-api.yandex.net/v1/disk/resources/upload'
+YANDEX_REPORTS_DIR = '/reports/test'
+PENDING_UPLOADS_FILE = 'data/pending_uploads.json'
+MAX_ATTEMPTS = 5
+BACKOFF_SECONDS = 2.0
+REQUEST_TIMEOUT = 30.0
+
+
+def _read_bytes(path):
+    with open(path, 'rb') as file:
+        return file.read()
+
+
+class RetryableUploadError(Exception):
+    """An upload failed in a way that may succeed when tried again."""
+
+
+class UploadQueue:
+    """
+    Background uploader of report files to Yandex Disk.
+
+    `enqueue` only records the path, so callers never wait on the network.
+    A single worker task drains the queue through a pooled `httpx.AsyncClient`
+    and retries transient failures up to `max_attempts` times with exponential
+    backoff. Paths that haven't been uploaded yet are kept in `pending_path`
+    and re-queued on the next start.
+    """
+
+    def __init__(self, token_loader, pending_path=PENDING_UPLOADS_FILE, api_url=YANDEX_UPLOAD_API,
+                 remote_dir=YANDEX_REPORTS_DIR, max_attempts=MAX_ATTEMPTS, backoff=BACKOFF_SECONDS,
+                 timeout=REQUEST_TIMEOUT):
+        self.token_loader = token_loader
+        self.pending_path = pending_path
+        self.api_url = api_url
+        self.remote_dir = remote_dir
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.timeout = timeout
+        self._pending = self._load_pending()
+        self._lock = threading.Lock()
+        self._loop = None
+        self._queue = None
+        self._client = None
+        self._worker = None
+
+    def _load_pending(self):
+        try:
+            with open(self.pending_path, 'r') as file:
+                return list(json.load(file))
+        except FileNotFoundError:
+            return []
+        except json.JSONDecodeError:
+            logging.error("Error decoding JSON from pending uploads file. Starting with an empty queue.")
+            return []
+
+    def _save_pending(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.pending_path)), exist_ok=True)
+        atomic_write(self.pending_path, json.dumps(self._pending))
+
+    def pending(self):
+        """Return the paths waiting to be uploaded."""
+        with self._lock:
+            return list(self._pending)
+
+    def enqueue(self, file_path):
+        """Schedule a file for upload without blocking. Safe to call from any thread."""
+        with self._lock:
+            if file_path in self._pending:
+                return
+            self._pending.append(file_path)
+            self._save_pending()
+        if self._queue is None:
+            return
+        try:
+            on_loop = asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            on_loop = False
+        if on_loop:
+            self._queue.put_nowait(file_path)
+        else:
+            self._loop.call_soon_threadsafe(self._queue.put_nowait, file_path)
+
+    def _done(self, file_path):
+        with self._lock:
+            if file_path in self._pending:
+                self._pending.remove(file_path)
+                self._save_pending()
+
+    async def start(self):
+        """Start the worker and re-queue uploads left over from the previous run."""
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue()
+        for file_path in self.pending():
+            self._queue.put_nowait(file_path)
+        self._client = httpx.AsyncClient(timeout=self.timeout)
+        self._worker = asyncio.create_task(self._run())
+
+    async def join(self):
+        """Wait until every queued upload has been processed."""
+        await self._queue.join()
+
+    async def stop(self):
+        """Stop the worker; unfinished uploads stay in the pending list."""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        self._queue = None
+
+    async def _run(self):
+        while True:
+            file_path = await self._queue.get()
+            try:
+                await self._upload_with_retries(file_path)
+            except Exception as e:
+                logging.error(f"Unexpected error during Yandex Disk upload: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def _upload_with_retries(self, file_path):
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                await self.upload(file_path)
+                await run_blocking(self._done, file_path)
+                return
+            except RetryableUploadError as e:
+                logging.warning(f"Upload of {file_path} failed (attempt {attempt}/{self.max_attempts}): {e}")
+            except (FileNotFoundError, ValueError) as e:
+                # Retrying won't help, drop the upload
+                logging.error(f"Giving up on upload of {file_path}: {e}")
+                await run_blocking(self._done, file_path)
+                return
+            if attempt < self.max_attempts:
+                await asyncio.sleep(self.backoff * 2 ** (attempt - 1))
+        # Kept in the pending list, so it is retried after the next restart
+        logging.error(f"Failed to upload {file_path} after {self.max_attempts} attempts")
+
+    async def upload(self, file_path):
+        """Upload one file. Raises RetryableUploadError on transient failures."""
+        token = await run_blocking(self.token_loader)
+        if not token or not isinstance(token, str):
+            raise ValueError("Invalid Yandex Disk token format")
+
+        content = await run_blocking(_read_bytes, file_path)
+        filename = os.path.basename(file_path)
+
+        try:
+            # Step 1: Get upload URL
+            response = await self._client.get(
+                self.api_url,
+                headers={'Authorization': f'OAuth {token}'},
+                params={'path': f'{self.remote_dir}/{filename}', 'overwrite': 'true'})
+            self._check_response(response, "Failed to get upload URL")
+
+            upload_url = response.json().get('href')
+            if not upload_url:
+                raise RetryableUploadError("No upload URL received from Yandex Disk API")
+
+            # Step 2: Upload the file
+            upload_response = await self._client.put(
+                upload_url, content=content,
+                headers={'Content-Type': 'text/plain; charset=utf-8'})
+            self._check_response(upload_response, "Failed to upload file")
+        except httpx.TransportError as e:
+            raise RetryableUploadError(f"Request error: {e}") from e
+        except json.JSONDecodeError as e:
+            raise RetryableUploadError(f"Error parsing JSON response: {e}") from e
+
+        logging.info(f"Successfully uploaded {filename} to Yandex Disk")
+
+    @staticmethod
+    def _check_response(response, message):
+        if response.status_code in (200, 201, 202):
+            return
+        if response.status_code == 429 or response.status_code >= 500:
+            raise RetryableUploadError(f"{message}: {response.status_code} {response.text}")
+        raise ValueError(f"{message}: {response.status_code} {response.text}")
+
+
+def setup_upload_queue(application, upload_queue):
+    """Run the upload worker for the lifetime of the application."""
+    post_init, post_shutdown = application.post_init, application.post_shutdown
+
+    async def start_uploads(app):
+        await upload_queue.start()
+        if post_init:
+            await post_init(app)
+
+    async def stop_uploads(app):
+        await upload_queue.stop()
+        if post_shutdown:
+            await post_shutdown(app)
+
+    application.post_init = start_uploads
+    application.post_shutdown = stop_uploads
@@ -1,44 +1,24 @@
-import pandas as pd
 from telegram import Update
 from telegram.ext import CallbackContext
-import os
-import json
-
-# File to store the user data
-USER_DB_FILE = 'users.csv'
+from .data_handler import get_user_registry
+from .config_store import get_config
 
 # Initialize the database
 def init_db():
-    if not os.path.exists(USER_DB_FILE):
-        df = pd.DataFrame(columns=['user_id', 'name', 'telegram_link'])
-        df.to_csv(USER_DB_FILE, index=False)
+    get_user_registry()
 
 def rename_user(user_id, new_name):
-    df = pd.read_csv('users.csv')
-    if user_id in df['user_id'].values:
-        df.loc[df['user_id'] == user_id, 'name'] = new_name
-        df.to_csv('users.csv', index=False)
-        return True
-    return False
+    return get_user_registry().rename(user_id, new_name)
 
 def is_user_verified(user_id):
-    try:
-        df = pd.read_csv(USER_DB_FILE)
-        return user_id in df['user_id'].values
-    except FileNotFoundError:
-        return False
+    return get_user_registry().is_verified(user_id)
 
 # Add a new user to the database
 def add_user(user_id, name, telegram_link):
-    df = pd.read_csv(USER_DB_FILE)
-    new_user = pd.DataFrame({'user_id': [user_id], 'name': [name], 'telegram_link': [telegram_link]})
-    df = pd.concat([df, new_user], ignore_index=True)
-    df.to_csv(USER_DB_FILE, index=False)
+    get_user_registry().add(user_id, name, telegram_link)
 
 def load_password(path = 'data/config.json'):
-    with open(path, 'r') as config_file:
-        data = json.load(config_file)
-    return data.get('verification_password')
+    return get_config(path).get('verification_password')
 
 
 # Verification process
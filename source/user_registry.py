@@ -0,0 +1,117 @@
+import csv
+import io
+import logging
+import os
+
+from .file_utils import atomic_write
+
+FIELDS = ['user_id', 'name', 'telegram_link']
+
+
+class UserRegistry:
+    """
+    Process-wide in-memory registry of verified users.
+
+    Users are loaded once into a dict of user id -> (name, telegram link), so
+    verification checks and name lookups are dictionary lookups. New users
+    are appended to the CSV file; renames rewrite it atomically. With a
+    `backend` (the SQLite backend) users are loaded from and written to the
+    database instead. With a `writer` (a `SerialWriter`) the writes run on the
+    writer's thread.
+    """
+
+    def __init__(self, path='users.csv', backend=None, writer=None):
+        self.path = path
+        self.backend = backend
+        self.writer = writer
+        self._users = {}
+        # Incremented on every change, so derived data can be cached per version
+        self.version = 0
+
+    def __len__(self):
+        return len(self._users)
+
+    def __contains__(self, user_id):
+        return user_id in self._users
+
+    def load(self):
+        """(Re)load all users from the backend or the CSV file."""
+        self.version += 1
+        if self.backend:
+            self._users = dict(self.backend.get_users())
+            return
+
+        self._users = {}
+        try:
+            with open(self.path, newline='', encoding='utf-8') as file:
+                for row in csv.DictReader(file):
+                    try:
+                        user_id = int(float(row['user_id']))
+                    except (TypeError, ValueError):
+                        logging.error(f"Skipping user with invalid id: {row!r}")
+                        continue
+                    self._users[user_id] = (row.get('name') or '', row.get('telegram_link') or '')
+        except FileNotFoundError:
+            logging.info(f"{self.path} not found. Starting with no users.")
+
+    def is_verified(self, user_id):
+        return user_id in self._users
+
+    def get(self, user_id):
+        """Return (name, telegram link) of a user, or None."""
+        return self._users.get(user_id)
+
+    def all(self):
+        """Return a dict of user id -> (name, telegram link)."""
+        return dict(self._users)
+
+    def _write(self, func, *args):
+        if self.writer:
+            return self.writer.submit(func, *args)
+        return func(*args)
+
+    async def wait_written(self):
+        """Wait until all changes so far have been written."""
+        if self.writer:
+            await self.writer.drain()
+
+    def add(self, user_id, name, telegram_link):
+        telegram_link = telegram_link or ''
+        is_new = user_id not in self._users
+        self._users[user_id] = (name, telegram_link)
+        self.version += 1
+        if self.backend:
+            self._write(self.backend.add_user, user_id, name, telegram_link)
+        elif is_new:
+            self._write(self._append, user_id, name, telegram_link)
+        else:
+            self._rewrite()
+
+    def rename(self, user_id, new_name):
+        """Change a user's name. Returns False if the user is unknown."""
+        if user_id not in self._users:
+            return False
+        self._users[user_id] = (new_name, self._users[user_id][1])
+        self.version += 1
+        if self.backend:
+            self._write(self.backend.rename_user, user_id, new_name)
+        else:
+            self._rewrite()
+        return True
+
+    def _append(self, user_id, name, telegram_link):
+        write_header = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+        with open(self.path, 'a', newline='', encoding='utf-8') as file:
+            writer = csv.writer(file, lineterminator='\n')
+            if write_header:
+                writer.writerow(FIELDS)
+            writer.writerow([user_id, name, telegram_link])
+
+    def _rewrite(self):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator='\n')
+        writer.writerow(FIELDS)
+        for user_id, (name, telegram_link) in self._users.items():
+            writer.writerow([user_id, name, telegram_link])
+        # The snapshot is taken here; only the file write is deferred to the writer
+        self._write(atomic_write, self.path, buffer.getvalue())
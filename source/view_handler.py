@@ -1,8 +1,9 @@
-import pandas as pd
 from .data_handler import *
 from datetime import datetime, date, timedelta
 from collections import defaultdict
 from source.user_handler import require_verification
+from .render_cache import RenderCache
+from .text_chunks import pack_messages
 import re
 
 # Dictionary to map English day names to Russian day names
@@ -105,14 +106,88 @@ def format_bookings(bookings):
 
     return "\n".join(output)
 
+def format_slot_line(time_range, users, own_only=False):
+    """Format one time slot of a grouped view."""
+    total_count = sum(user_info['count'] for user_info in users.values())
+    if own_only:
+        # For /my command, we only need to show the user's own bookings
+        return f"{time_range}: {int(total_count)} {get_concept_form(total_count)}\n"
+    user_str_parts = []
+    for name, user_info in users.items():
+        if user_info['link']:
+            user_str_parts.append(f"{int(user_info['count'])}x <a href='{user_info['link']}'>{name}</a>")
+        else:
+            user_str_parts.append(f"{int(user_info['count'])}x {name}")
+    user_str = ", ".join(user_str_parts)
+    return f"{time_range}: {total_count} {get_concept_form(total_count)} ({user_str})\n"
+
+
+def iter_day_blocks(header, bookings, today, own_only=False):
+    """Yield the header, then one block per day (nearest day first) grouped by time slot."""
+    by_day = defaultdict(list)
+    for booking in bookings:
+        by_day[booking['date']].append(booking)
+
+    yield header
+    for day in sorted(by_day, key=lambda d: (abs((d - today).days), d)):
+        parts = [f"{translate_date_string(day.strftime('%d/%m (%A)'))}\n"]
+        for time_range, users in group_bookings(by_day[day], include_date=False).items():
+            parts.append(format_slot_line(time_range, users, own_only))
+        parts.append("\n")
+        yield "".join(parts)
+
+
+def iter_view_blocks(kind, user_id=None, target_date=None, today=None):
+    """
+    Yield the text of a view block by block: 'all' bookings, one 'day'
+    (`target_date`) or 'my' bookings of `user_id`.
+    """
+    today = today or date.today()
+    if kind == 'my':
+        yield from iter_day_blocks("Ваши бронирования:\n\n", get_store().for_user(user_id), today, own_only=True)
+    elif kind == 'day':
+        yield f"Бронирования на {target_date.strftime('%d.%m')}:\n\n"
+        for time_range, users in group_bookings(get_day_bookings(target_date), include_date=False).items():
+            yield format_slot_line(time_range, users)
+    else:
+        yield from iter_day_blocks("Все забронированные концепты:\n\n", get_all_bookings(), today)
+
+
+def render_bookings(kind, user_id=None, target_date=None, today=None):
+    """Render the whole text of a view."""
+    return "".join(iter_view_blocks(kind, user_id, target_date, today))
+
+
+_render_cache = RenderCache()
+
+
+def get_render_cache():
+    return _render_cache
+
+
+def cached_render(kind, user_id=None, target_date=None):
+    """
+    Render a view packed into messages under Telegram's length limit, reusing
+    the last rendering while bookings and users are unchanged.
+    """
+    today = date.today()
+    key = (kind, user_id, target_date, today, get_store().version, get_user_registry().version)
+    return _render_cache.get_or_render(
+        key, lambda: tuple(pack_messages(iter_view_blocks(kind, user_id, target_date, today))))
+
+
+async def send_messages(message, texts):
+    """Reply with several messages in order."""
+    for text in texts:
+        await message.reply_text(text, parse_mode='HTML', disable_web_page_preview=True)
+
+
 @require_verification
 async def view_bookings(update, context):
     """Shows all booked concepts or bookings for a specific day or user, grouped by time and users."""
     user_input = context.args[0] if context.args else None
-    remove_old_bookings()
-    bookings = get_all_bookings()
 
-    if not bookings:
+    if not len(get_store()):
         await update.message.reply_text("Бронирований не найдено.")
         return
 
@@ -120,52 +195,22 @@ async def view_bookings(update, context):
     is_my_command = update.message.text.startswith('/my')
 
     if is_my_command:
-        # Filter bookings for the current user
-        filtered_bookings = [b for b in bookings if b['user_id'] == user_id]
-        if not filtered_bookings:
+        if not get_store().for_user(user_id):
             await update.message.reply_text("У вас нет бронирований.")
             return
-        grouped_bookings = group_bookings(filtered_bookings, include_date=True)
-        message = "Ваши бронирования:\n\n"
+        messages = cached_render('my', user_id=user_id)
 
     elif user_input:
         target_date = parse_date(user_input, datetime.now().date())
         if not target_date:
             await update.message.reply_text("Неверный формат даты. Пожалуйста, используйте дд.мм или дд")
             return
-        filtered_bookings = [b for b in bookings if (b['date'].date() if isinstance(b['date'], datetime) else b['date']) == target_date]
-        grouped_bookings = group_bookings(filtered_bookings, include_date=False)
-        message = f"Бронирования на {target_date.strftime('%d.%m')}:\n\n"
+        messages = cached_render('day', target_date=target_date)
 
     else:
-        grouped_bookings = group_bookings(bookings, include_date=True)
-        message = "Все забронированные концепты:\n\n"
+        messages = cached_render('all')
 
-    # Sort dates from nearest to farthest
-    today = date.today()
-    sorted_dates = sorted(grouped_bookings.keys(), key=lambda x: abs((datetime.strptime(x.split()[0], '%d/%m').replace(year=today.year).date() - today).days))
-
-    for date_str in sorted_dates:
-        message += f"{date_str}\n"
-        for time_range, users in grouped_bookings[date_str].items():
-            if is_my_command:
-                # For /my command, we only need to show the user's own bookings
-                user_info = users.get(get_user_name(user_id), {'count': 0, 'link': ''})
-                if user_info['count'] > 0:
-                    message += f"{time_range}: {int(user_info['count'])} {get_concept_form(user_info['count'])}\n"
-            else:
-                total_count = sum(user_info['count'] for user_info in users.values())
-                user_str_parts = []
-                for name, user_info in users.items():
-                    if user_info['link']:
-                        user_str_parts.append(f"{int(user_info['count'])}x <a href='{user_info['link']}'>{name}</a>")
-                    else:
-                        user_str_parts.append(f"{int(user_info['count'])}x {name}")
-                user_str = ", ".join(user_str_parts)
-                message += f"{time_range}: {total_count} {get_concept_form(total_count)} ({user_str})\n"
-        message += "\n"
-
-    await update.message.reply_text(message, parse_mode='HTML', disable_web_page_preview=True)
+    await send_messages(update.message, messages)
 
 def get_target_date(day, current_date):
     """Calculate the target date based on the given day and current date."""
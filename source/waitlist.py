@@ -0,0 +1,148 @@
+import json
+import logging
+import os
+import threading
+from bisect import bisect_left, insort
+from datetime import datetime, timedelta
+from itertools import groupby
+
+from .file_utils import atomic_write
+
+WAITLIST_FILE = 'data/waitlist.json'
+
+
+def _write_file(path, text):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    atomic_write(path, text)
+
+
+def entry_end(entry):
+    return entry['start'] + timedelta(minutes=entry['duration'])
+
+
+class Waitlist:
+    """
+    Users waiting for places in full slots.
+
+    Entries are kept in a time-sorted index of (start, entry id) pairs, so
+    the entries overlapping a freed time range are found by bisecting that
+    index rather than scanning the whole list. Entry ids grow with every
+    entry, so within one slot (same start and duration) ordering by id is
+    first come, first served. The list is small and written as one atomic
+    JSON snapshot on every change. With a `writer` (a `SerialWriter`) the
+    snapshot is written on the writer's thread.
+    """
+
+    def __init__(self, path=WAITLIST_FILE, writer=None):
+        self.path = path
+        self.writer = writer
+        self._lock = threading.RLock()
+        self._entries = {}
+        self._index = []
+        self._max_duration = 0
+        self._next_id = 1
+
+    def __len__(self):
+        return len(self._entries)
+
+    def load(self):
+        """(Re)load the waitlist from its JSON file."""
+        try:
+            with open(self.path, 'r') as f:
+                records = json.load(f)
+        except FileNotFoundError:
+            records = []
+        except json.JSONDecodeError:
+            logging.error("Error decoding JSON from waitlist file. Starting with an empty waitlist.")
+            records = []
+        with self._lock:
+            self._entries.clear()
+            self._index.clear()
+            self._max_duration = 0
+            self._next_id = 1
+            for record in records:
+                record['start'] = datetime.fromisoformat(record['start'])
+                self._insert(record)
+
+    def _save(self):
+        records = [dict(entry, start=entry['start'].isoformat()) for entry in self.all()]
+        # The snapshot is taken here; only the file write is deferred to the writer
+        text = json.dumps(records, ensure_ascii=False)
+        if self.writer:
+            self.writer.submit(_write_file, self.path, text)
+        else:
+            _write_file(self.path, text)
+
+    async def wait_written(self):
+        """Wait until all changes so far have been written."""
+        if self.writer:
+            await self.writer.drain()
+
+    def _insert(self, entry):
+        self._next_id = max(self._next_id, entry['id'] + 1)
+        self._entries[entry['id']] = entry
+        insort(self._index, (entry['start'], entry['id']))
+        self._max_duration = max(self._max_duration, entry['duration'])
+
+    def add(self, user_id, chat_id, start, duration, places):
+        """Queue a user for a slot and return the entry; a user waits for each slot at most once."""
+        with self._lock:
+            for entry in self.for_user(user_id):
+                if entry['start'] == start and entry['duration'] == duration:
+                    return entry
+            entry = {
+                'id': self._next_id,
+                'user_id': user_id,
+                'chat_id': chat_id,
+                'start': start,
+                'duration': duration,
+                'places': places,
+            }
+            self._insert(entry)
+            self._save()
+            return dict(entry)
+
+    def remove(self, entry_ids):
+        """Remove entries by id and return the removed entries."""
+        with self._lock:
+            removed = []
+            for entry_id in entry_ids:
+                entry = self._entries.pop(entry_id, None)
+                if entry is None:
+                    continue
+                del self._index[bisect_left(self._index, (entry['start'], entry_id))]
+                removed.append(entry)
+            if removed:
+                self._save()
+            return removed
+
+    def all(self):
+        with self._lock:
+            return [dict(self._entries[entry_id]) for _, entry_id in self._index]
+
+    def for_user(self, user_id):
+        with self._lock:
+            return [dict(self._entries[entry_id]) for _, entry_id in self._index
+                    if self._entries[entry_id]['user_id'] == user_id]
+
+    def overlapping(self, start=None, end=None):
+        """
+        Return entries overlapping [start, end), or all entries without
+        bounds, grouped per slot in first come, first served order.
+        """
+        with self._lock:
+            lo = 0 if start is None else bisect_left(self._index, (start - timedelta(minutes=self._max_duration),))
+            hi = len(self._index) if end is None else bisect_left(self._index, (end,))
+            entries = [self._entries[entry_id] for _, entry_id in self._index[lo:hi]]
+            if start is not None:
+                entries = [entry for entry in entries if entry_end(entry) > start]
+            entries.sort(key=lambda entry: (entry['start'], entry['duration'], entry['id']))
+            return [[dict(entry) for entry in slot]
+                    for _, slot in groupby(entries, key=lambda entry: (entry['start'], entry['duration']))]
+
+    def remove_started(self, now=None):
+        """Drop entries whose slot has already started and return them."""
+        now = now or datetime.now()
+        with self._lock:
+            started = self._index[:bisect_left(self._index, (now + timedelta(microseconds=1),))]
+            return self.remove([entry_id for _, entry_id in started])
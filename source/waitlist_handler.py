@@ -0,0 +1,163 @@
+import asyncio
+from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
+from telegram.ext import CallbackContext, CallbackQueryHandler
+from datetime import datetime, timedelta
+from .data_handler import get_store, get_waitlist, try_book_async, get_user_status, set_user_status
+from .user_handler import require_verification, is_user_verified
+from .valid_book import is_valid_booking_time
+from .view_handler import translate_date_string, get_concept_form
+from .log_handler import get_logger
+
+logger = get_logger(__name__)
+
+# One promotion at a time, so an entry can't be booked twice by overlapping runs
+_promotion_lock = asyncio.Lock()
+
+
+def format_slot(start, duration):
+    date_str = translate_date_string(start.strftime('%d/%m (%A)'), short=True)
+    end = start + timedelta(minutes=duration)
+    return f"{date_str} {start.strftime('%H:%M')}-{end.strftime('%H:%M')}"
+
+
+def waitlist_button(start, places, duration):
+    """Inline button that puts the user on the waitlist of a slot."""
+    return InlineKeyboardButton(
+        "Встать в лист ожидания",
+        callback_data=f"wait_{start.strftime('%Y-%m-%d_%H:%M')}_{places}_{duration}")
+
+
+async def promote_waitlist(bot, start=None, end=None):
+    """
+    Book waiting users into places that became free in [start, end), or
+    anywhere without bounds, and notify them. Within a slot users are served
+    first come, first served: once the head of a slot's queue doesn't fit,
+    later entries of that slot keep waiting. Entries the timetable or a gym
+    closure no longer allow are dropped. Returns the promoted entries.
+    """
+    async with _promotion_lock:
+        return await _promote(bot, start, end)
+
+
+async def _promote(bot, start, end):
+    waitlist = get_waitlist()
+    waitlist.remove_started()
+    promoted = []
+    for slot in waitlist.overlapping(start, end):
+        for entry in slot:
+            # The timetable or a closure may have changed since the user joined
+            valid, message = is_valid_booking_time(entry['start'], places=entry['places'], duration=entry['duration'])
+            if not valid:
+                waitlist.remove([entry['id']])
+                logger.info(f"WAITLIST: dropped user {entry['user_id']} from {entry['start']}: {message}")
+                try:
+                    await bot.send_message(
+                        entry['chat_id'],
+                        f"Запись в листе ожидания на {format_slot(entry['start'], entry['duration'])} снята.\n{message}")
+                except Exception as e:
+                    logger.error(f"Error notifying user {entry['user_id']} about a dropped waitlist entry: {e}")
+                continue
+            attempt = await try_book_async(entry['user_id'], entry['start'], entry['duration'], entry['places'])
+            if attempt.booking_id is None:
+                break
+            waitlist.remove([entry['id']])
+            promoted.append(entry)
+            logger.info(f"WAITLIST: user {entry['user_id']} promoted into {entry['start']} "
+                        f"for {entry['duration']} min., places: {entry['places']}")
+            try:
+                await bot.send_message(
+                    entry['chat_id'],
+                    f"Освободилось место! Ваша бронь из листа ожидания на {format_slot(entry['start'], entry['duration'])} "
+                    f"({entry['places']} {get_concept_form(entry['places'])}) подтверждена. Отменить её можно через /delete.")
+            except Exception as e:
+                logger.error(f"Error notifying user {entry['user_id']} about a waitlist booking: {e}")
+    return promoted
+
+
+async def join_waitlist_callback(update: Update, context: CallbackContext):
+    query = update.callback_query
+    await query.answer()
+
+    user_id = update.effective_user.id
+    if not is_user_verified(user_id):
+        await query.edit_message_text("Вам необходимо пройти верификацию. Используйте команду /verify.")
+        return
+
+    _, date_str, time_str, places, duration = query.data.split('_')
+    start = datetime.strptime(f'{date_str}_{time_str}', '%Y-%m-%d_%H:%M')
+    places, duration = int(places), int(duration)
+    if start <= datetime.now():
+        await query.edit_message_text("К сожалению это время уже прошло. Пожалуйста, выберите другое время.")
+        return
+
+    entry = get_waitlist().add(user_id, update.effective_chat.id, start, duration, places)
+    logger.info(f"WAITLIST: user {user_id} is waiting for {start} for {duration} min., places: {places}")
+    if get_user_status(user_id) == 'wait_book_response':
+        # Waiting for the slot replaces the partial booking offered for it
+        context.user_data.pop('pending_booking', None)
+        set_user_status(user_id, 'default')
+    await query.edit_message_text(
+        f"Вы в листе ожидания на {format_slot(start, duration)} ({places} {get_concept_form(places)}). "
+        f"Как только места освободятся, бронь будет оформлена автоматически и придёт уведомление.")
+    # Places may have been freed between the rejection and the tap
+    await promote_waitlist(context.bot, entry['start'], entry['start'] + timedelta(minutes=duration))
+
+
+@require_verification
+async def waitlist_command(update: Update, context: CallbackContext):
+    """Show the user's waitlist entries with buttons to leave them."""
+    entries = get_waitlist().for_user(update.effective_user.id)
+    if not entries:
+        await update.message.reply_text("Вы не стоите в листе ожидания.")
+        return
+    keyboard = [[InlineKeyboardButton(f"{format_slot(entry['start'], entry['duration'])} - {entry['places']}x",
+                                      callback_data=f"unwait_{entry['id']}")]
+                for entry in entries]
+    await update.message.reply_text("Лист ожидания. Нажмите, чтобы покинуть:",
+                                    reply_markup=InlineKeyboardMarkup(keyboard))
+
+
+async def leave_waitlist_callback(update: Update, context: CallbackContext):
+    query = update.callback_query
+    await query.answer()
+
+    user_id = update.effective_user.id
+    entry_id = int(query.data[len('unwait_'):])
+    own_ids = [entry['id'] for entry in get_waitlist().for_user(user_id) if entry['id'] == entry_id]
+    removed = get_waitlist().remove(own_ids)
+    if removed:
+        await query.edit_message_text(
+            f"Вы покинули лист ожидания на {format_slot(removed[0]['start'], removed[0]['duration'])}.")
+    else:
+        await query.edit_message_text("Этой записи в листе ожидания уже нет.")
+
+
+def setup_waitlist(application):
+    """
+    Offer freed places to waiting users: whenever bookings are deleted, the
+    waitlist entries overlapping them are promoted. Expired bookings are
+    ignored, since every entry overlapping one has already started.
+    """
+    post_init = application.post_init
+    loop = None
+
+    async def remember_loop(app):
+        nonlocal loop
+        loop = asyncio.get_running_loop()
+        if post_init:
+            await post_init(app)
+
+    application.post_init = remember_loop
+
+    def on_bookings_changed(op, bookings):
+        if op != 'delete' or not bookings or loop is None:
+            return
+        starts = [datetime.combine(b['date'], b['time']) for b in bookings]
+        start = min(starts)
+        end = max(s + timedelta(minutes=b.get('duration', 60)) for s, b in zip(starts, bookings))
+        # Store listeners may run on any thread, promotion belongs on the event loop
+        loop.call_soon_threadsafe(application.create_task, promote_waitlist(application.bot, start, end))
+
+    get_store().subscribe(on_bookings_changed)
+    application.add_handler(CallbackQueryHandler(join_waitlist_callback, pattern='^wait_'))
+    application.add_handler(CallbackQueryHandler(leave_waitlist_callback, pattern='^unwait_'))
@@ -0,0 +1,79 @@
+import unittest
+import sys, os
+import asyncio
+import tempfile
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from unittest import mock
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from source import data_handler
+from source.async_io import SerialWriter
+from source.booking_store import BookingJournal, BookingStore
+from source.user_registry import UserRegistry
+from source.view_handler import view_bookings
+
+WRITE_DELAY = 0.5
+
+
+class SlowJournal(BookingJournal):
+    def append(self, events):
+        time.sleep(WRITE_DELAY)
+        return super().append(events)
+
+
+class TestSlowWritesDontBlockReads(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.writer = SerialWriter()
+        store = BookingStore(backend=SlowJournal(os.path.join(self.tmp_dir.name, 'bookings.json')), writer=self.writer)
+        store.load()
+        registry = UserRegistry(os.path.join(self.tmp_dir.name, 'users.csv'))
+        registry.add(1, 'Иван', '')
+
+        self.patches = [
+            mock.patch.object(data_handler, '_store', store),
+            mock.patch.object(data_handler, '_user_registry', registry),
+            mock.patch.object(data_handler, 'get_max_bookings_per_hour', return_value=6),
+        ]
+        for patch in self.patches:
+            patch.start()
+
+    def tearDown(self):
+        for patch in self.patches:
+            patch.stop()
+        self.writer.shutdown()
+        self.tmp_dir.cleanup()
+
+    def test_slow_write_does_not_delay_view(self):
+        update = SimpleNamespace(
+            effective_user=SimpleNamespace(id=1),
+            message=SimpleNamespace(text='/view', reply_text=mock.AsyncMock()))
+        context = SimpleNamespace(args=[], user_data={})
+        booking_datetime = datetime.now().replace(second=0, microsecond=0) + timedelta(days=1)
+
+        async def book():
+            start = time.monotonic()
+            attempt = await data_handler.try_book_async(1, booking_datetime)
+            self.assertIsNotNone(attempt.booking_id)
+            return time.monotonic() - start
+
+        async def view():
+            await asyncio.sleep(0)
+            start = time.monotonic()
+            await view_bookings(update, context)
+            return time.monotonic() - start
+
+        async def run():
+            return await asyncio.gather(book(), view())
+
+        book_time, view_time = asyncio.run(run())
+        self.assertGreaterEqual(book_time, WRITE_DELAY)
+        self.assertLess(view_time, WRITE_DELAY / 5)
+        update.message.reply_text.assert_awaited_once()
+        self.assertIn('Иван', update.message.reply_text.await_args.args[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
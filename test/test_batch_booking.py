@@ -0,0 +1,72 @@
+import unittest
+import sys, os
+import asyncio
+import tempfile
+from datetime import datetime
+from types import SimpleNamespace
+from unittest import mock
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from source import booking_handler, data_handler, datetime_parser
+from source.booking_store import BookingStore
+
+
+NOW = datetime(2025, 3, 3, 12, 0)
+
+
+class FrozenDatetime(datetime):
+    @classmethod
+    def now(cls, tz=None):
+        return NOW
+
+
+class TestBatchBooking(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.store = BookingStore(os.path.join(self.tmp_dir.name, 'bookings.json'))
+        self.store.load()
+        # dd.mm dates are read in the current year, so both are pinned away from New Year
+        self.day = datetime(2025, 3, 5)
+        self.store.add(9, self.day.replace(hour=20), places=5)
+        patches = [
+            mock.patch.object(data_handler, '_store', self.store),
+            mock.patch.object(datetime_parser, 'datetime', FrozenDatetime),
+            mock.patch.object(data_handler, 'get_max_bookings_per_hour', return_value=6),
+            mock.patch.object(booking_handler, 'is_user_verified', return_value=True),
+            mock.patch.object(booking_handler, 'is_valid_booking_time', side_effect=self.is_valid),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def is_valid(self, start, places=1, duration=60):
+        if start.hour >= 22:
+            return False, "зал закрыт"
+        return True, ""
+
+    def test_lines_booked_in_one_write_with_one_reply(self):
+        date_str = self.day.strftime('%d.%m')
+        text = f"{date_str} 19:00 2\n{date_str} 20:00 2\n\n{date_str} 22:00 1\nчто-то\n{date_str} 21:00 3 90"
+        update = SimpleNamespace(
+            effective_user=SimpleNamespace(id=1),
+            message=SimpleNamespace(text=text, reply_text=mock.AsyncMock()))
+        context = SimpleNamespace(args=[], user_data={})
+
+        with mock.patch.object(self.store.backend, 'append', wraps=self.store.backend.append) as append:
+            asyncio.run(booking_handler.process_booking_request(update, context))
+
+        self.assertEqual(append.call_count, 1)
+        self.assertEqual(sorted((b['time'].hour, b['places']) for b in self.store.for_user(1)), [(19, 2), (21, 3)])
+        update.message.reply_text.assert_awaited_once()
+        reply = update.message.reply_text.await_args.args[0]
+        self.assertTrue(reply.startswith("Забронировано 2 из 5."))
+        self.assertIn("свободно только 1", reply)
+        self.assertIn("зал закрыт", reply)
+        self.assertIn("что-то — неподдерживаемый формат", reply)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,10 @@
 import unittest
+import sys, os
 from datetime import datetime, timedelta
 import pandas as pd
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from source.occupancy import OccupancyTimeline
 
 def T_get_available_places(df, booking_datetime):
     MAX_BOOKINGS_PER_HOUR = 6
@@ -61,6 +65,8 @@ def T_get_available_places(df, booking_datetime):
     return max(0, available_places)  # Ensure we don't return negative values
 
 class TestBooking(unittest.TestCase):
+    get_available_places = staticmethod(T_get_available_places)
+
     def setUp(self):
         self.df = pd.DataFrame([
             {"user_id": 277218291, "date": "2025-02-24", "time": "19:00:00", "places": 4},
@@ -68,18 +74,18 @@ class TestBooking(unittest.TestCase):
         ])
 
     def test_available_places(self):
-        self.assertEqual(T_get_available_places(self.df, datetime(2025, 2, 24, 18, 0)), 6)
-        self.assertEqual(T_get_available_places(self.df, datetime(2025, 2, 24, 18, 1)), 2)
-        self.assertEqual(T_get_available_places(self.df, datetime(2025, 2, 24, 18, 59)), 2)
-        self.assertEqual(T_get_available_places(self.df, datetime(2025, 2, 24, 19, 0)), 2)
-        self.assertEqual(T_get_available_places(self.df, datetime(2025, 2, 24, 19, 1)), 2)
-        self.assertEqual(T_get_available_places(self.df, datetime(2025, 2, 24, 19, 59)), 2)
-        self.assertEqual(T_get_available_places(self.df, datetime(2025, 2, 24, 20, 0)), 4)
-        self.assertEqual(T_get_available_places(self.df, datetime(2025, 2, 24, 20, 1)), 4)
-        self.assertEqual(T_get_available_places(self.df, datetime(2025, 2, 24, 20, 59)), 4)
-        self.assertEqual(T_get_available_places(self.df, datetime(2025, 2, 24, 21, 0)), 6)
-        self.assertEqual(T_get_available_places(self.df, datetime(2025, 2, 28, 17, 0)), 6)
-        self.assertEqual(T_get_available_places(self.df, datetime(2025, 3, 1, 12, 0)), 6)
+        self.assertEqual(self.get_available_places(self.df, datetime(2025, 2, 24, 18, 0)), 6)
+        self.assertEqual(self.get_available_places(self.df, datetime(2025, 2, 24, 18, 1)), 2)
+        self.assertEqual(self.get_available_places(self.df, datetime(2025, 2, 24, 18, 59)), 2)
+        self.assertEqual(self.get_available_places(self.df, datetime(2025, 2, 24, 19, 0)), 2)
+        self.assertEqual(self.get_available_places(self.df, datetime(2025, 2, 24, 19, 1)), 2)
+        self.assertEqual(self.get_available_places(self.df, datetime(2025, 2, 24, 19, 59)), 2)
+        self.assertEqual(self.get_available_places(self.df, datetime(2025, 2, 24, 20, 0)), 4)
+        self.assertEqual(self.get_available_places(self.df, datetime(2025, 2, 24, 20, 1)), 4)
+        self.assertEqual(self.get_available_places(self.df, datetime(2025, 2, 24, 20, 59)), 4)
+        self.assertEqual(self.get_available_places(self.df, datetime(2025, 2, 24, 21, 0)), 6)
+        self.assertEqual(self.get_available_places(self.df, datetime(2025, 2, 28, 17, 0)), 6)
+        self.assertEqual(self.get_available_places(self.df, datetime(2025, 3, 1, 12, 0)), 6)
 
     def test_complicated_cases(self):
         self.df = pd.DataFrame([
@@ -89,17 +95,58 @@ class TestBooking(unittest.TestCase):
             {"user_id": 1729489075, "date": "2025-02-24", "time": "20:30:00", "places": 3}
         ])
 
-        self.assertEqual(T_get_available_places(self.df, datetime(2025, 2, 24, 19, 0)), 2)
-        self.assertEqual(T_get_available_places(self.df, datetime(2025, 2, 24, 19, 1)), 2)
-        self.assertEqual(T_get_available_places(self.df, datetime(2025, 2, 24, 19, 30)), 2)
-        self.assertEqual(T_get_available_places(self.df, datetime(2025, 2, 24, 19, 59)), 1)
-        self.assertEqual(T_get_available_places(self.df, datetime(2025, 2, 24, 20, 00)), 1)
-        self.assertEqual(T_get_available_places(self.df, datetime(2025, 2, 24, 20, 1)), 1)
-        self.assertEqual(T_get_available_places(self.df, datetime(2025, 2, 24, 20, 30)), 1)
-        self.assertEqual(T_get_available_places(self.df, datetime(2025, 2, 24, 20, 59)), 1)
-        self.assertEqual(T_get_available_places(self.df, datetime(2025, 2, 24, 21, 00)), 3)
+        self.assertEqual(self.get_available_places(self.df, datetime(2025, 2, 24, 19, 0)), 2)
+        self.assertEqual(self.get_available_places(self.df, datetime(2025, 2, 24, 19, 1)), 2)
+        self.assertEqual(self.get_available_places(self.df, datetime(2025, 2, 24, 19, 30)), 2)
+        self.assertEqual(self.get_available_places(self.df, datetime(2025, 2, 24, 19, 59)), 1)
+        self.assertEqual(self.get_available_places(self.df, datetime(2025, 2, 24, 20, 00)), 1)
+        self.assertEqual(self.get_available_places(self.df, datetime(2025, 2, 24, 20, 1)), 1)
+        self.assertEqual(self.get_available_places(self.df, datetime(2025, 2, 24, 20, 30)), 1)
+        self.assertEqual(self.get_available_places(self.df, datetime(2025, 2, 24, 20, 59)), 1)
+        self.assertEqual(self.get_available_places(self.df, datetime(2025, 2, 24, 21, 00)), 3)
+
+
+def V_get_available_places(df, booking_datetime, duration=60):
+    MAX_BOOKINGS_PER_HOUR = 6
+
+    timeline = OccupancyTimeline()
+    for booking in df.to_dict('records'):
+        start = datetime.strptime(f"{booking['date']} {booking['time']}", '%Y-%m-%d %H:%M:%S')
+        timeline.add(start, int(booking.get('duration', 60)), int(booking['places']))
+    occupied = timeline.max_occupancy(booking_datetime, duration)
+    return max(0, MAX_BOOKINGS_PER_HOUR - occupied)
 
 
+class TestTimelineBooking(TestBooking):
+    """Run the same boundary cases against the per-minute occupancy timeline."""
+    get_available_places = staticmethod(V_get_available_places)
+
+    def test_matches_reference_on_every_minute(self):
+        df = pd.DataFrame([
+            {"user_id": 1, "date": "2025-02-24", "time": "18:15:00", "places": 1},
+            {"user_id": 2, "date": "2025-02-24", "time": "19:00:00", "places": 2},
+            {"user_id": 3, "date": "2025-02-24", "time": "19:00:00", "places": 1},
+            {"user_id": 4, "date": "2025-02-24", "time": "19:45:00", "places": 3},
+            {"user_id": 5, "date": "2025-02-24", "time": "20:00:00", "places": 2},
+        ])
+        start = datetime(2025, 2, 24, 17, 0)
+        for minute in range(0, 5 * 60):
+            booking_datetime = start + timedelta(minutes=minute)
+            self.assertEqual(V_get_available_places(df.copy(), booking_datetime),
+                             T_get_available_places(df.copy(), booking_datetime), f"Failed at {booking_datetime}")
+
+    def test_durations(self):
+        df = pd.DataFrame([
+            {"user_id": 1, "date": "2025-02-24", "time": "19:00:00", "places": 2, "duration": 90},
+            {"user_id": 2, "date": "2025-02-24", "time": "20:00:00", "places": 3, "duration": 30},
+        ])
+        self.assertEqual(V_get_available_places(df, datetime(2025, 2, 24, 18, 0), 60), 6)
+        self.assertEqual(V_get_available_places(df, datetime(2025, 2, 24, 18, 0), 61), 4)
+        self.assertEqual(V_get_available_places(df, datetime(2025, 2, 24, 20, 0), 30), 1)
+        self.assertEqual(V_get_available_places(df, datetime(2025, 2, 24, 20, 29), 60), 1)
+        self.assertEqual(V_get_available_places(df, datetime(2025, 2, 24, 20, 30), 60), 6)
+        self.assertEqual(V_get_available_places(df, datetime(2025, 2, 24, 17, 0), 240), 1)
+
 
 if __name__ == '__main__':
     unittest.main()
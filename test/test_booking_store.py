@@ -0,0 +1,269 @@
+import unittest
+import sys, os
+import json
+import random
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, date, time, timedelta
+from unittest import mock
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from source.booking_store import BookingStore
+
+
+class TestBookingStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, 'bookings.json')
+        with open(self.path, 'w') as f:
+            json.dump([
+                {"user_id": 1241016050, "date": "2025-02-24", "time": "19:00:00", "places": 2},
+                {"user_id": 277218291, "date": "2025-02-24", "time": "19:30:00", "places": 2, "duration": 90},
+                {"user_id": 677265840, "date": "2025-02-25", "time": "20:00:00", "places": 2},
+                {"user_id": 277218291, "date": "2025-02-23", "time": "20:30:00", "places": 3},
+            ], f)
+        self.store = BookingStore(self.path)
+        self.store.load()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_load_sorts_and_defaults(self):
+        bookings = self.store.all()
+        self.assertEqual(len(bookings), 4)
+        self.assertEqual([b['date'] for b in bookings],
+                         [date(2025, 2, 23), date(2025, 2, 24), date(2025, 2, 24), date(2025, 2, 25)])
+        self.assertEqual(bookings[1]['duration'], 60)
+        self.assertEqual(len({b['id'] for b in bookings}), 4)
+
+    def test_overlapping(self):
+        overlapping = self.store.overlapping(datetime(2025, 2, 24, 20, 0), datetime(2025, 2, 24, 21, 0))
+        self.assertEqual([b['user_id'] for b in overlapping], [277218291])
+        self.assertEqual(self.store.overlapping(datetime(2025, 2, 24, 21, 0), datetime(2025, 2, 24, 22, 0)), [])
+        self.assertEqual(len(self.store.overlapping(datetime(2025, 2, 24, 19, 45), datetime(2025, 2, 24, 19, 50))), 2)
+
+    def test_day_and_user_queries(self):
+        self.assertEqual(len(self.store.for_day(date(2025, 2, 24))), 2)
+        self.assertEqual(self.store.for_day(date(2025, 2, 26)), [])
+        user_bookings = self.store.for_user(277218291)
+        self.assertEqual([b['date'] for b in user_bookings], [date(2025, 2, 23), date(2025, 2, 24)])
+        self.assertEqual(self.store.for_user(42), [])
+
+    def test_add_remove_and_save(self):
+        booking = self.store.add(42, datetime(2025, 2, 24, 18, 0), places=1, duration=30)
+        self.assertEqual(self.store.for_user(42)[0]['id'], booking['id'])
+        self.store.save()
+
+        reloaded = BookingStore(self.path)
+        reloaded.load()
+        self.assertEqual(reloaded.all(), self.store.all())
+
+        removed = self.store.remove([booking['id']])
+        self.assertEqual(len(removed), 1)
+        self.assertEqual(self.store.for_user(42), [])
+        self.assertEqual(self.store.find(277218291, date(2025, 2, 24), time(19, 30), 90)[0]['places'], 2)
+
+    def test_expire(self):
+        expired = self.store.expire(datetime(2025, 2, 24, 20, 30))
+        self.assertEqual(sorted(b['user_id'] for b in expired), [277218291, 1241016050])
+        self.assertEqual(len(self.store), 2)
+        self.assertEqual(self.store.expire(datetime(2025, 2, 24, 20, 30)), [])
+
+    def test_next_expiry_skips_removed_bookings(self):
+        self.assertEqual(self.store.next_expiry(), datetime(2025, 2, 23, 21, 30))
+        first = self.store.all()[0]
+        self.store.remove([first['id']])
+        self.assertEqual(self.store.next_expiry(), datetime(2025, 2, 24, 20, 0))
+        self.assertEqual(len(self.store.expire(datetime(2025, 2, 24, 20, 0))), 1)
+
+        events = []
+        self.store.subscribe(lambda op, bookings: events.append((op, len(bookings))))
+        self.store.add(42, datetime(2025, 2, 24, 19, 0), duration=30)
+        self.store.expire(datetime(2025, 2, 24, 19, 30))
+        self.assertEqual(events, [('add', 1), ('expire', 1)])
+
+
+def reference_occupancy(bookings, start, duration):
+    """Maximum places taken in [start, +duration), checked at the window start and every booking start in it."""
+    end = start + timedelta(minutes=duration)
+    intervals = [(datetime.combine(b['date'], b['time']), b['duration'], b['places']) for b in bookings]
+    intervals = [(s, s + timedelta(minutes=d), p) for s, d, p in intervals]
+    points = [start] + [s for s, _, _ in intervals if start < s < end]
+    return max(sum(p for s, e, p in intervals if s <= point < e) for point in points)
+
+
+class TestOccupancyTimeline(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.store = BookingStore(os.path.join(self.tmp_dir.name, 'bookings.json'))
+        self.store.load()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def assert_matches_reference(self, windows):
+        bookings = self.store.all()
+        for start, duration in windows:
+            expected = reference_occupancy(bookings, start, duration)
+            self.assertEqual(self.store.max_occupancy(start, duration), expected, f"Failed at {start} for {duration}")
+
+    def test_matches_reference(self):
+        rng = random.Random(42)
+        day_start = datetime(2025, 2, 24, 8, 0)
+        added = []
+        for _ in range(60):
+            start = day_start + timedelta(minutes=rng.randrange(0, 14 * 60, 5))
+            added.append(self.store.add(rng.randrange(1, 20), start, rng.randint(1, 3), rng.choice([30, 60, 90])))
+        windows = [(day_start + timedelta(minutes=m), d) for m in range(0, 15 * 60, 7) for d in (30, 60, 120)]
+        self.assert_matches_reference(windows)
+
+        self.store.remove(b['id'] for b in added[::2])
+        self.store.expire(datetime(2025, 2, 24, 12, 0))
+        self.assert_matches_reference(windows)
+
+    def test_booking_across_midnight(self):
+        self.store.add(1, datetime(2025, 2, 24, 23, 30), places=2, duration=90)
+        self.assertEqual(self.store.max_occupancy(datetime(2025, 2, 25, 0, 30), 60), 2)
+        self.assertEqual(self.store.max_occupancy(datetime(2025, 2, 25, 1, 0), 60), 0)
+        self.assertEqual(int(self.store.day_occupancy(date(2025, 2, 24))[23 * 60 + 30]), 2)
+
+    def test_removal_clears_day(self):
+        booking = self.store.add(1, datetime(2025, 2, 24, 19, 0), places=3)
+        self.store.remove([booking['id']])
+        self.assertFalse(self.store.day_occupancy(date(2025, 2, 24)).any())
+        self.assertEqual(self.store.max_occupancy(datetime(2025, 2, 24, 19, 0), 60), 0)
+
+
+class TestBookingJournal(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, 'bookings.json')
+        self.journal_path = os.path.join(self.tmp_dir.name, 'bookings.journal')
+        self.store = BookingStore(self.path, self.journal_path)
+        self.store.load()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def reload(self):
+        store = BookingStore(self.path, self.journal_path)
+        store.load()
+        return store
+
+    def read_journal(self):
+        with open(self.journal_path) as f:
+            return [json.loads(line) for line in f]
+
+    def test_mutations_append_one_line_each(self):
+        first = self.store.add(1, datetime(2025, 2, 24, 19, 0), places=2)
+        self.store.add(2, datetime(2025, 2, 24, 20, 0))
+        self.store.remove([first['id']])
+        self.store.expire(datetime(2025, 2, 24, 21, 0))
+        self.assertEqual([e['op'] for e in self.read_journal()], ['add', 'add', 'delete', 'expire'])
+        self.assertFalse(os.path.exists(self.path))
+        # Nothing expired, nothing written
+        self.store.expire(datetime(2025, 2, 24, 21, 0))
+        self.assertEqual(len(self.read_journal()), 4)
+
+    def test_recovery_replays_journal_and_compacts(self):
+        self.store.add(1, datetime(2025, 2, 24, 19, 0), places=2)
+        second = self.store.add(2, datetime(2025, 2, 24, 20, 0))
+        self.store.add(3, datetime(2025, 2, 25, 20, 0))
+        self.store.remove([second['id']])
+
+        recovered = self.reload()
+        self.assertEqual(recovered.all(), self.store.all())
+        self.assertEqual(self.read_journal(), [])
+        with open(self.path) as f:
+            self.assertEqual(len(json.load(f)), 2)
+
+        # Ids keep increasing after recovery
+        self.assertGreater(recovered.add(4, datetime(2025, 2, 26, 20, 0))['id'], second['id'])
+
+    def test_partial_last_line_is_ignored(self):
+        self.store.add(1, datetime(2025, 2, 24, 19, 0))
+        with open(self.journal_path, 'a') as f:
+            f.write('{"op": "add", "booking": {"user_id": 2, "da')
+        recovered = self.reload()
+        self.assertEqual([b['user_id'] for b in recovered.all()], [1])
+        recovered.add(3, datetime(2025, 2, 24, 20, 0))
+        self.assertEqual([b['user_id'] for b in self.reload().all()], [1, 3])
+
+    def test_periodic_compaction(self):
+        store = BookingStore(self.path, self.journal_path, compact_every=3)
+        store.load()
+        for hour in range(10, 14):
+            store.add(1, datetime(2025, 2, 24, hour, 0))
+        self.assertEqual(len(self.read_journal()), 1)
+        with open(self.path) as f:
+            self.assertEqual(len(json.load(f)), 3)
+        self.assertEqual(len(self.reload()), 4)
+
+
+class TestTryBook(unittest.TestCase):
+    CAPACITY = 6
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.store = BookingStore(os.path.join(self.tmp_dir.name, 'bookings.json'))
+        self.store.load()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_try_book_reports_free_places(self):
+        slot = datetime(2025, 2, 24, 19, 0)
+        first = self.store.try_book(1, slot, 60, 4, self.CAPACITY)
+        self.assertIsNotNone(first.booking_id)
+        self.assertEqual(first.available, 2)
+        rejected = self.store.try_book(2, slot + timedelta(minutes=30), 60, 3, self.CAPACITY)
+        self.assertEqual(rejected, (None, 2))
+        self.assertIsNotNone(self.store.try_book(2, slot + timedelta(minutes=60), 60, 6, self.CAPACITY).booking_id)
+
+    def test_concurrent_bookings_never_exceed_capacity(self):
+        rng = random.Random(15)
+        slot = datetime(2025, 2, 24, 23, 0)
+        requests = [(user_id, slot + timedelta(minutes=rng.choice([-30, 0, 15, 30, 45])),
+                     rng.choice([30, 60, 90]), rng.randint(1, 3)) for user_id in range(400)]
+
+        def book(request):
+            user_id, start, duration, places = request
+            return self.store.try_book(user_id, start, duration, places, self.CAPACITY)
+
+        with ThreadPoolExecutor(max_workers=32) as pool:
+            attempts = list(pool.map(book, requests))
+
+        self.assertTrue(any(a.booking_id is not None for a in attempts))
+        self.assertEqual(len(self.store), sum(a.booking_id is not None for a in attempts))
+        self.assertLessEqual(reference_occupancy(self.store.all(), slot - timedelta(hours=1), 240), self.CAPACITY)
+        self.assertLessEqual(self.store.max_occupancy(slot - timedelta(hours=1), 240), self.CAPACITY)
+
+
+    def test_try_book_many_single_write(self):
+        slot = datetime(2025, 2, 25, 19, 0)
+        starts = [slot + timedelta(weeks=week) for week in range(4)]
+        self.store.add(9, starts[2], places=5)
+        with mock.patch.object(self.store.backend, 'append', wraps=self.store.backend.append) as append:
+            attempts = self.store.try_book_many(1, [(start, 60, 2) for start in starts], self.CAPACITY)
+        self.assertEqual(append.call_count, 1)
+        self.assertEqual([a.booking_id is not None for a in attempts], [True, True, False, True])
+        self.assertEqual(attempts[2], (None, 1))
+
+        reloaded = BookingStore(os.path.join(self.tmp_dir.name, 'bookings.json'))
+        reloaded.load()
+        self.assertEqual(len(reloaded.for_user(1)), 3)
+
+    def test_try_book_many_all_or_nothing(self):
+        slot = datetime(2025, 2, 25, 19, 0)
+        starts = [slot + timedelta(weeks=week) for week in range(3)]
+        self.store.add(9, starts[1], places=5)
+        version = self.store.version
+        attempts = self.store.try_book_many(1, [(start, 60, 2) for start in starts], self.CAPACITY,
+                                            all_or_nothing=True)
+        self.assertEqual(attempts, [(None, 6), (None, 1), (None, 6)])
+        self.assertEqual(self.store.for_user(1), [])
+        self.assertEqual(self.store.max_occupancy(starts[0], 60), 0)
+        self.assertGreater(self.store.version, version)
+
+if __name__ == '__main__':
+    unittest.main()
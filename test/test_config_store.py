@@ -0,0 +1,53 @@
+import unittest
+import sys, os
+import json
+import tempfile
+from unittest import mock
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from source.config_store import ConfigStore
+from source.data_handler import get_instruction_text
+
+
+class TestConfigStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, 'config.json')
+        with open(self.path, 'w') as f:
+            json.dump({'number_of_concepts': 6, 'admin_ids': [1]}, f)
+        self.config = ConfigStore(self.path)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_file_is_parsed_once(self):
+        with mock.patch('source.config_store.json.load', wraps=json.load) as load:
+            for _ in range(10):
+                self.assertEqual(self.config.get('number_of_concepts'), 6)
+        self.assertEqual(load.call_count, 1)
+
+    def test_external_edit_is_picked_up(self):
+        self.assertEqual(self.config.get('number_of_concepts'), 6)
+        with open(self.path, 'w') as f:
+            json.dump({'number_of_concepts': 12, 'admin_ids': [1]}, f)
+        self.assertEqual(self.config.get('number_of_concepts'), 12)
+
+    def test_update_writes_and_refreshes(self):
+        self.config.update(number_of_concepts=8, close_GYM_from="NaN")
+        self.assertEqual(self.config.get('number_of_concepts'), 8)
+        with open(self.path) as f:
+            self.assertEqual(json.load(f), {'number_of_concepts': 8, 'admin_ids': [1], 'close_GYM_from': "NaN"})
+
+    def test_instruction_texts_are_cached(self):
+        path = os.path.join(self.tmp_dir.name, 'texts.json')
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'start_welcome': 'Привет, {user_name}!'}, f, ensure_ascii=False)
+        with mock.patch('source.config_store.json.load', wraps=json.load) as load:
+            for _ in range(4):
+                self.assertEqual(get_instruction_text('start_welcome', path).format(user_name='Ваня'), 'Привет, Ваня!')
+        self.assertEqual(load.call_count, 1)
+        self.assertEqual(get_instruction_text('missing', path), "Instruction text not found.")
+
+
+if __name__ == '__main__':
+    unittest.main()
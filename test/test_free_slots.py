@@ -0,0 +1,76 @@
+import unittest
+import sys, os
+import tempfile
+from datetime import date, datetime
+from unittest import mock
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from source import free_handler
+from source.datetime_parser import BookingWindow
+from source.booking_store import BookingStore
+
+TIMETABLE = {'fri_open': '08:00', 'fri_close': '12:00', 'sat_open': '-1', 'sat_close': '-1'}
+DAY = date(2024, 3, 1)  # Friday
+
+
+class TestFreeSlots(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.store = BookingStore(os.path.join(self.tmp_dir.name, 'bookings.json'))
+        self.store.load()
+        self.closure = ("NaN", "NaN")
+        patches = [
+            mock.patch.object(free_handler, 'get_store', return_value=self.store),
+            mock.patch.object(free_handler, 'get_gym_timetable', return_value=TIMETABLE),
+            mock.patch.object(free_handler, 'get_gym_closed_periods', side_effect=lambda: self.closure),
+            mock.patch.object(free_handler, 'get_max_bookings_per_hour', return_value=6),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def slots(self, day=DAY, now=datetime(2024, 2, 1)):
+        return {start.strftime('%H:%M'): places for start, places in free_handler.get_free_slots(day, now=now)}
+
+    def test_matches_store_availability(self):
+        self.store.add(1, datetime(2024, 3, 1, 9, 0), places=4, duration=90)
+        self.store.add(2, datetime(2024, 3, 1, 10, 0), places=2, duration=60)
+        slots = self.slots()
+        self.assertEqual(list(slots), ['08:00', '08:30', '09:00', '09:30', '10:00', '10:30', '11:00'])
+        for time_str, places in slots.items():
+            start = datetime.strptime(f'2024-03-01 {time_str}', '%Y-%m-%d %H:%M')
+            self.assertEqual(places, 6 - self.store.max_occupancy(start, 60))
+        self.assertEqual(slots['10:00'], 0)
+        self.assertEqual(slots['10:30'], 4)
+        self.assertEqual(slots['11:00'], 6)
+
+    def test_skips_closed_and_past_slots(self):
+        self.closure = ("2024-03-01 09:15:00", "2024-03-01 10:00:00")
+        self.assertEqual(list(self.slots(now=datetime(2024, 3, 1, 8, 0))), ['10:00', '10:30', '11:00'])
+        self.assertEqual(self.slots(date(2024, 3, 2)), {})
+
+    def test_nearest_slots_fit_places_and_duration(self):
+        self.store.add(1, datetime(2024, 3, 1, 9, 0), places=5, duration=60)
+        self.store.add(2, datetime(2024, 3, 1, 11, 30), places=5, duration=30)
+        requested = datetime(2024, 3, 1, 9, 15)
+        nearest = free_handler.find_nearest_slots(requested, places=2, duration=60, k=3, now=datetime(2024, 2, 1))
+        # Candidates are on the requested time's half-hour grid and never overlap 09:00-10:00 or 11:30-12:00
+        self.assertEqual([start.strftime('%H:%M') for start in nearest], ['10:15'])
+        nearest = free_handler.find_nearest_slots(requested, places=1, duration=60, k=2, now=datetime(2024, 2, 1))
+        self.assertEqual([start.strftime('%H:%M') for start in nearest], ['08:45', '09:45'])
+
+    def test_solve_window(self):
+        self.store.add(1, datetime(2024, 3, 1, 8, 0), places=6, duration=60)
+        self.store.add(2, datetime(2024, 3, 1, 9, 30), places=3, duration=30)
+        now = datetime(2024, 2, 1)
+        window = BookingWindow(datetime(2024, 3, 1, 8, 0), datetime(2024, 3, 1, 12, 0), 2, 90, 'earliest')
+        self.assertEqual(free_handler.solve_window(window, now=now), (datetime(2024, 3, 1, 9, 0), 3))
+        least_crowded = window._replace(prefer='least_crowded')
+        self.assertEqual(free_handler.solve_window(least_crowded, now=now), (datetime(2024, 3, 1, 10, 0), 6))
+        self.assertIsNone(free_handler.solve_window(window._replace(places=5, end=datetime(2024, 3, 1, 11, 0)), now=now))
+
+if __name__ == '__main__':
+    unittest.main()
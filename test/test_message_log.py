@@ -0,0 +1,70 @@
+import unittest
+import sys, os
+import asyncio
+import gzip
+import json
+import tempfile
+from datetime import datetime
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from source.message_log import MessageLog, migrate_message_files
+
+
+class TestMessageLog(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.log_dir = self.tmp_dir.name
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def read_lines(self, name, opener=open):
+        with opener(os.path.join(self.log_dir, name), 'rt', encoding='utf-8') as f:
+            return [json.loads(line) for line in f]
+
+    def test_flush_writes_daily_files(self):
+        log = MessageLog(self.log_dir)
+        log.write(1, 'ivan', 'Привет', datetime(2025, 3, 18, 23, 59))
+        log.write(2, None, '/view', datetime(2025, 3, 19, 0, 1))
+        self.assertEqual(os.listdir(self.log_dir), [])
+
+        self.assertEqual(log.flush(), 2)
+        self.assertEqual(self.read_lines('messages_2025-03-18.jsonl')[0]['message'], 'Привет')
+        self.assertEqual(self.read_lines('messages_2025-03-19.jsonl')[0]['user_id'], 2)
+        self.assertEqual(log.flush(), 0)
+
+    def test_gzip_appends(self):
+        log = MessageLog(self.log_dir, compress=True)
+        for text in ('a', 'b'):
+            log.write(1, 'ivan', text, datetime(2025, 3, 18, 12, 0))
+            log.flush()
+        self.assertEqual([r['message'] for r in self.read_lines('messages_2025-03-18.jsonl.gz', gzip.open)], ['a', 'b'])
+
+    def test_background_writer_flushes_full_batch(self):
+        log = MessageLog(self.log_dir, flush_interval=60, batch_size=3)
+
+        async def run():
+            await log.start()
+            for i in range(3):
+                log.write(i, 'user', str(i), datetime(2025, 3, 18, 12, i))
+            await asyncio.sleep(0.05)
+            written = len(self.read_lines('messages_2025-03-18.jsonl'))
+            log.write(4, 'user', 'last', datetime(2025, 3, 18, 13, 0))
+            await log.stop()
+            return written
+
+        self.assertEqual(asyncio.run(run()), 3)
+        self.assertEqual(len(self.read_lines('messages_2025-03-18.jsonl')), 4)
+
+    def test_migrate_message_files(self):
+        for i, timestamp in enumerate([datetime(2025, 3, 18, 10, 0), datetime(2025, 3, 18, 9, 0)]):
+            with open(os.path.join(self.log_dir, f"message_{timestamp.strftime('%Y%m%d_%H%M%S')}_{i}.json"), 'w') as f:
+                json.dump({"user_id": i, "username": "u", "message": str(i), "timestamp": timestamp.isoformat()}, f, indent=2)
+
+        self.assertEqual(migrate_message_files(self.log_dir), 2)
+        self.assertEqual(os.listdir(self.log_dir), ['messages_2025-03-18.jsonl'])
+        self.assertEqual([r['message'] for r in self.read_lines('messages_2025-03-18.jsonl')], ['1', '0'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,7 +3,9 @@ import sys, os
 from datetime import datetime, time, timedelta
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from source.datetime_parser import parse_date, parse_time, parse_amount, parse_booking_datetime
+from source.datetime_parser import (
+    parse_date, parse_time, parse_amount, parse_booking_datetime, parse_booking_window,
+    parse_booking_series)
 
 
 class TestDatetimeParser(unittest.TestCase):
@@ -137,5 +139,39 @@ class TestDatetimeParser(unittest.TestCase):
             self.assertIsNone(amount, f"Should be None for invalid input: {invalid_input}")
 
 
+    def test_parse_booking_window(self):
+        window = parse_booking_window("18:00-22:00 2 90")
+        self.assertEqual((window.start.time(), window.end.time()), (time(18, 0), time(22, 0)))
+        self.assertEqual((window.places, window.duration, window.prefer), (2, 90, 'earliest'))
+        self.assertEqual(window.start.date(), datetime.now().date())
+
+        window = parse_booking_window("25.03 1800-2200 свободнее")
+        self.assertEqual((window.start.month, window.start.day), (3, 25))
+        self.assertEqual((window.places, window.duration, window.prefer), (1, 60, 'least_crowded'))
+
+        # Not window requests
+        self.assertIsNone(parse_booking_window("18:00 2"))
+        self.assertIsNone(parse_booking_window("18:00 -1"))
+        self.assertIsNone(parse_booking_window("22:00-18:00"))
+
+    def test_parse_booking_series(self):
+        now = datetime(2024, 2, 27, 20, 0)  # Tuesday evening
+        series = parse_booking_series("каждый вт 19:00 8 недель 2", now=now)
+        self.assertEqual(len(series.starts), 8)
+        self.assertEqual(series.starts[0], datetime(2024, 3, 5, 19, 0))
+        self.assertEqual(series.starts[-1] - series.starts[0], timedelta(weeks=7))
+        self.assertEqual((series.places, series.duration, series.all_or_nothing), (2, 60, False))
+
+        series = parse_booking_series("every Tue 21:00 3 1 90 all", now=now)
+        self.assertEqual(series.starts[0], datetime(2024, 2, 27, 21, 0))
+        self.assertEqual((series.places, series.duration, series.all_or_nothing), (1, 90, True))
+
+        self.assertIsNone(parse_booking_series("вт 19:00 8 2", now=now))
+        self.assertIsNone(parse_booking_series("каждый xx 19:00 8", now=now))
+        self.assertIsNone(parse_booking_series("каждый вт 19:00 100", now=now))
+        # The trailing word doesn't count towards the required fields
+        self.assertIsNone(parse_booking_series("каждый вт 19:00 все", now=now))
+        self.assertIsNone(parse_booking_series("every tue 19:00 all", now=now))
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
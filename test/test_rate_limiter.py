@@ -0,0 +1,87 @@
+import unittest
+import sys, os
+import asyncio
+from datetime import timedelta
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from telegram.error import RetryAfter
+
+from unittest import mock
+
+from source import rate_limiter
+from source.rate_limiter import CommandRateLimiter, FloodControlRateLimiter, TokenBucket
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestTokenBucket(unittest.TestCase):
+    def test_burst_then_refill(self):
+        clock = FakeClock()
+        bucket = TokenBucket(rate=2, burst=3, clock=clock)
+        self.assertEqual([bucket.try_acquire() for _ in range(4)], [True, True, True, False])
+        self.assertAlmostEqual(bucket.delay(), 0.5)
+        clock.now = 0.5
+        self.assertTrue(bucket.try_acquire())
+        clock.now = 100
+        self.assertTrue(bucket.is_full())
+
+
+class TestCommandRateLimiter(unittest.TestCase):
+    def test_per_user_and_global_limits(self):
+        clock = FakeClock()
+        limiter = CommandRateLimiter(user_rate=1, user_burst=2, global_rate=1, global_burst=3,
+                                     notice_interval=10, clock=clock)
+        self.assertEqual([limiter.allow(1) for _ in range(3)], [True, True, False])
+        # Another user still gets through until the global bucket is empty
+        self.assertEqual([limiter.allow(2) for _ in range(2)], [True, False])
+
+        self.assertTrue(limiter.should_notify(1))
+        self.assertFalse(limiter.should_notify(1))
+        clock.now = 10
+        self.assertTrue(limiter.should_notify(1))
+        self.assertTrue(limiter.allow(1))
+
+    def test_notices_are_pruned(self):
+        clock = FakeClock()
+        limiter = CommandRateLimiter(notice_interval=10, clock=clock)
+        with mock.patch.object(rate_limiter, 'MAX_TRACKED_USERS', 3):
+            for user_id in range(3):
+                limiter.should_notify(user_id)
+            clock.now = 5
+            self.assertTrue(limiter.should_notify(3))
+            clock.now = 12
+            self.assertTrue(limiter.should_notify(4))
+            # Only notices still inside the interval are kept
+            self.assertEqual(set(limiter._notices), {3, 4})
+            self.assertFalse(limiter.should_notify(3))
+
+
+class TestFloodControlRateLimiter(unittest.TestCase):
+    def test_retries_after_flood_error(self):
+        calls = []
+
+        async def send_message(**kwargs):
+            calls.append(kwargs)
+            if len(calls) == 1:
+                raise RetryAfter(timedelta(seconds=0))
+            return True
+
+        async def run():
+            limiter = FloodControlRateLimiter(overall_rate=1000)
+            await limiter.initialize()
+            result = await limiter.process_request(send_message, (), {'text': 'hi'}, 'sendMessage', {'chat_id': -5}, None)
+            await limiter.shutdown()
+            return result
+
+        self.assertTrue(asyncio.run(run()))
+        self.assertEqual(len(calls), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
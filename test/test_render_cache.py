@@ -0,0 +1,72 @@
+import unittest
+import sys, os
+import tempfile
+from datetime import date, datetime
+from unittest import mock
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from source import data_handler, view_handler
+from source.booking_store import BookingStore
+from source.render_cache import RenderCache
+from source.user_registry import UserRegistry
+
+
+class TestRenderCache(unittest.TestCase):
+    def test_lru_and_stats(self):
+        cache = RenderCache(maxsize=2)
+        self.assertEqual(cache.get_or_render('a', lambda: 1), 1)
+        self.assertEqual(cache.get_or_render('a', lambda: 2), 1)
+        cache.get_or_render('b', lambda: 3)
+        cache.get_or_render('a', lambda: 4)
+        cache.get_or_render('c', lambda: 5)
+        # 'b' was the least recently used entry
+        self.assertEqual(cache.get_or_render('b', lambda: 6), 6)
+        self.assertEqual(cache.stats(), {'hits': 2, 'misses': 4, 'hit_rate': 2 / 6, 'size': 2})
+
+
+class TestCachedRender(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.store = BookingStore(os.path.join(self.tmp_dir.name, 'bookings.json'))
+        self.store.load()
+        self.store.add(1, datetime(2025, 3, 18, 19, 0), places=2)
+        self.store.add(2, datetime(2025, 3, 20, 19, 0), duration=90)
+        self.registry = UserRegistry(os.path.join(self.tmp_dir.name, 'users.csv'))
+        self.registry.add(1, 'Иван', 'https://t.me/ivan')
+
+        self.patches = [
+            mock.patch.object(data_handler, '_store', self.store),
+            mock.patch.object(data_handler, '_user_registry', self.registry),
+            mock.patch.object(view_handler, '_render_cache', RenderCache()),
+        ]
+        for patch in self.patches:
+            patch.start()
+
+    def tearDown(self):
+        for patch in self.patches:
+            patch.stop()
+        self.tmp_dir.cleanup()
+
+    def test_render_all_and_day(self):
+        text = view_handler.render_bookings('all', today=date(2025, 3, 19))
+        self.assertTrue(text.startswith("Все забронированные концепты:\n\n18/03 (Вторник)\n"))
+        self.assertIn("19:00-20:00: 2 концепта (2x <a href='https://t.me/ivan'>Иван</a>)\n", text)
+        self.assertIn("19:00-20:30: 1 концепт (1x Неопознанная Капибара)\n", text)
+        self.assertEqual(view_handler.render_bookings('day', target_date=date(2025, 3, 20)),
+                         "Бронирования на 20.03:\n\n19:00-20:30: 1 концепт (1x Неопознанная Капибара)\n")
+        self.assertEqual(view_handler.render_bookings('my', user_id=1, today=date(2025, 3, 19)),
+                         "Ваши бронирования:\n\n18/03 (Вторник)\n19:00-20:00: 2 концепта\n\n")
+
+    def test_cache_follows_store_and_registry_versions(self):
+        first = view_handler.cached_render('all')
+        self.assertIs(view_handler.cached_render('all'), first)
+        self.store.add(3, datetime(2025, 3, 21, 19, 0))
+        second = view_handler.cached_render('all')
+        self.assertIn('21/03', second[0])
+        self.registry.rename(1, 'Пётр')
+        self.assertIn('Пётр', view_handler.cached_render('all')[0])
+        self.assertEqual(view_handler.get_render_cache().stats()['hits'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
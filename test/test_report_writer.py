@@ -0,0 +1,51 @@
+import unittest
+import sys, os
+import tempfile
+from datetime import date, time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from source.report_writer import ReportWriter
+
+
+class TestReportWriter(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.report_dir = self.tmp_dir.name
+        with open(os.path.join(self.report_dir, '2025-03-18.txt'), 'w', encoding='utf-8') as f:
+            f.write("Report on 18.03.2025\n\n")
+        self.uploaded = []
+        self.writer = ReportWriter(self.report_dir, on_new_report=self.uploaded.append)
+        self.user_data = {1: ('Иван', 'https://t.me/ivan')}
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def read(self, name):
+        with open(os.path.join(self.report_dir, name), encoding='utf-8') as f:
+            return f.read()
+
+    def test_batch_writes_one_report_per_day(self):
+        bookings = [
+            {'user_id': 2, 'date': date(2025, 3, 20), 'time': time(20, 0), 'places': 2, 'duration': 90},
+            {'user_id': 1, 'date': date(2025, 3, 20), 'time': time(19, 0), 'places': 1, 'duration': 60},
+            {'user_id': 1, 'date': date(2025, 3, 18), 'time': time(21, 0), 'places': 1, 'duration': 60},
+        ]
+        self.assertEqual(self.writer.write(bookings, self.user_data), 3)
+
+        self.assertEqual(self.read('2025-03-20.txt'),
+                         "Report on 20.03.2025\n\n"
+                         "- 19:00-20:00: Иван (https://t.me/ivan) - 1 places, 60 min\n"
+                         "- 20:00-21:30: User ID: 2 - 2 places, 90 min\n")
+        self.assertTrue(self.read('2025-03-18.txt').endswith("- 21:00-22:00: Иван (https://t.me/ivan) - 1 places, 60 min\n"))
+        self.assertEqual(self.uploaded, [os.path.join(self.report_dir, '2025-03-18.txt')])
+
+    def test_previous_report_uses_index(self):
+        self.writer.write([{'user_id': 1, 'date': date(2025, 3, 19), 'time': time(9, 0)}], self.user_data)
+        os.remove(os.path.join(self.report_dir, '2025-03-19.txt'))
+        # The index is not rebuilt from the directory
+        self.assertEqual(self.writer.previous_report(date(2025, 3, 21)), os.path.join(self.report_dir, '2025-03-19.txt'))
+        self.assertIsNone(self.writer.previous_report(date(2025, 3, 18)))
+
+
+if __name__ == '__main__':
+    unittest.main()
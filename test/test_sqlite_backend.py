@@ -0,0 +1,91 @@
+import unittest
+import sys, os
+import json
+import tempfile
+from datetime import datetime, date
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from source.booking_store import BookingStore
+from source.sqlite_backend import SQLiteBackend
+
+
+class TestSQLiteBackend(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp_dir.name, 'bot.sqlite3')
+        self.backend = SQLiteBackend(self.db_path)
+
+    def tearDown(self):
+        self.backend.close()
+        self.tmp_dir.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.tmp_dir.name, name)
+
+    def test_wal_mode_and_indexes(self):
+        mode = self.backend.connection.execute('PRAGMA journal_mode').fetchone()[0]
+        self.assertEqual(mode, 'wal')
+        indexes = {row[1] for row in self.backend.connection.execute('PRAGMA index_list(bookings)')}
+        self.assertTrue({'idx_bookings_date_time', 'idx_bookings_user_id', 'idx_bookings_end_at'} <= indexes)
+
+    def test_store_persists_through_backend(self):
+        store = BookingStore(backend=self.backend)
+        store.load()
+        first = store.add(1, datetime(2025, 2, 24, 19, 0), places=2)
+        store.add(2, datetime(2025, 2, 24, 19, 30), places=1, duration=90)
+        store.add(3, datetime(2025, 2, 25, 8, 0))
+        store.remove([first['id']])
+        store.expire(datetime(2025, 2, 25, 0, 0))
+
+        reloaded = BookingStore(backend=SQLiteBackend(self.db_path))
+        reloaded.load()
+        self.assertEqual(reloaded.all(), store.all())
+        self.assertEqual([b['user_id'] for b in reloaded.all()], [3])
+
+    def test_overlapping_query(self):
+        store = BookingStore(backend=self.backend)
+        store.load()
+        store.add(1, datetime(2025, 2, 24, 19, 0))
+        store.add(2, datetime(2025, 2, 24, 19, 30), duration=90)
+        store.add(3, datetime(2025, 2, 24, 23, 30), duration=60)
+        overlapping = self.backend.overlapping(datetime(2025, 2, 24, 20, 0), datetime(2025, 2, 24, 21, 0))
+        self.assertEqual([b['user_id'] for b in overlapping], [2])
+        overlapping = self.backend.overlapping(datetime(2025, 2, 25, 0, 0), datetime(2025, 2, 25, 1, 0))
+        self.assertEqual([b['user_id'] for b in overlapping], [3])
+
+    def test_users_and_status(self):
+        self.assertFalse(self.backend.is_user_verified(1))
+        self.backend.add_user(1, 'Иванов', 'https://t.me/ivanov')
+        self.assertTrue(self.backend.is_user_verified(1))
+        self.assertTrue(self.backend.rename_user(1, 'Петров'))
+        self.assertFalse(self.backend.rename_user(2, 'Сидоров'))
+        self.assertEqual(self.backend.get_users(), {1: ('Петров', 'https://t.me/ivanov')})
+
+        self.assertEqual(self.backend.get_user_status(1), 'default')
+        self.backend.set_user_status(1, 'wait_book_response')
+        self.assertEqual(self.backend.get_user_status(1), 'wait_book_response')
+
+    def test_import_from_files(self):
+        with open(self.path('bookings.json'), 'w') as f:
+            json.dump([{"user_id": 1, "date": "2025-02-24", "time": "19:00:00", "places": 2}], f)
+        with open(self.path('bookings.journal'), 'w') as f:
+            f.write(json.dumps({"op": "add", "booking": {"id": 7, "user_id": 2, "date": "2025-02-24",
+                                                          "time": "20:00:00", "places": 1, "duration": 90}}) + '\n')
+        with open(self.path('users.csv'), 'w') as f:
+            f.write('user_id,name,telegram_link\n1,Иванов,https://t.me/ivanov\n2,Петров,\n')
+        with open(self.path('user_status.json'), 'w') as f:
+            json.dump({"1": "default", "2": "verification_name"}, f)
+
+        counts = self.backend.import_from_files(self.path('bookings.json'), self.path('bookings.journal'),
+                                                self.path('users.csv'), self.path('user_status.json'))
+        self.assertEqual(counts, {'bookings': 2, 'users': 2, 'user_statuses': 2})
+
+        store = BookingStore(backend=self.backend)
+        store.load()
+        self.assertEqual([(b['user_id'], b['duration']) for b in store.for_day(date(2025, 2, 24))], [(1, 60), (2, 90)])
+        self.assertEqual(self.backend.get_user(2), ('Петров', ''))
+        self.assertEqual(self.backend.get_user_status(2), 'verification_name')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import unittest
+import sys, os
+import json
+import tempfile
+from unittest import mock
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from source.async_io import SerialWriter
+from source.sqlite_backend import SQLiteBackend
+from source.status_store import UserStatusStore
+
+
+class TestUserStatusStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, 'user_status.json')
+        with open(self.path, 'w') as f:
+            json.dump({'1': 'wait_book_response'}, f)
+        self.store = UserStatusStore(self.path)
+        self.store.load()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def read(self):
+        with open(self.path) as f:
+            return json.load(f)
+
+    def test_changes_are_flushed_once(self):
+        scheduled = []
+        self.store.on_dirty = lambda: scheduled.append(True)
+        self.assertEqual(self.store.get(1), 'wait_book_response')
+        self.assertEqual(self.store.get(2), 'default')
+
+        self.store.set(1, 'default')
+        self.store.set(2, 'verification_pass')
+        self.store.set(2, 'verification_pass')
+        self.assertEqual(len(scheduled), 2)
+        # Nothing is written until the flush
+        self.assertEqual(self.read(), {'1': 'wait_book_response'})
+
+        self.assertTrue(self.store.flush())
+        self.assertEqual(self.read(), {'1': 'default', '2': 'verification_pass'})
+        self.assertFalse(self.store.flush())
+
+    def test_reload(self):
+        self.store.set(3, 'close_GYM_from')
+        self.store.flush()
+        reloaded = UserStatusStore(self.path)
+        reloaded.load()
+        self.assertEqual(reloaded.get(3), 'close_GYM_from')
+        self.assertEqual(reloaded.get(1), 'wait_book_response')
+
+
+    def test_sqlite_writes_go_through_writer(self):
+        backend = SQLiteBackend(os.path.join(self.tmp_dir.name, 'bot.sqlite3'))
+        backend.set_user_status(1, 'verification_name')
+        writer = SerialWriter()
+        store = UserStatusStore(backend=backend, writer=writer)
+        store.load()
+        self.assertEqual(store.get(1), 'verification_name')
+
+        with mock.patch.object(backend, 'get_user_status') as read:
+            store.set(2, 'wait_book_response')
+            self.assertEqual(store.get(2), 'wait_book_response')
+        read.assert_not_called()
+        writer.drain_sync()
+        writer.shutdown()
+        self.assertEqual(backend.get_user_status(2), 'wait_book_response')
+        backend.close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+import unittest
+import sys, os
+from datetime import date, time
+from unittest import mock
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from source import view_handler
+from source.text_chunks import pack_messages, split_html
+
+
+class TestSplitHtml(unittest.TestCase):
+    def test_prefers_line_breaks_and_keeps_markup_whole(self):
+        text = 'a b\n<a href="tg://user?id=1">Иван Петров</a> &amp; more text'
+        pieces = split_html(text, limit=40)
+        self.assertEqual(''.join(pieces), text)
+        self.assertEqual(pieces[0], 'a b\n')
+        for piece in pieces:
+            self.assertEqual(piece.count('<a '), piece.count('</a>'))
+            self.assertNotIn('&am', piece.replace('&amp;', ''))
+
+    def test_pieces_fit_limit(self):
+        text = ' '.join(f'<b>{i}</b>' for i in range(1000))
+        pieces = split_html(text, limit=100)
+        self.assertEqual(''.join(pieces), text)
+        self.assertTrue(all(len(piece) <= 100 for piece in pieces))
+
+
+class TestPackMessages(unittest.TestCase):
+    def test_packs_blocks_in_order(self):
+        blocks = ['x' * 40, 'y' * 40, 'z' * 40, 'w' * 150]
+        messages = list(pack_messages(iter(blocks), limit=100))
+        self.assertEqual(''.join(messages), ''.join(blocks))
+        self.assertEqual(messages[0], 'x' * 40 + 'y' * 40)
+        self.assertTrue(all(len(message) <= 100 for message in messages))
+
+    def test_large_schedule_is_split(self):
+        bookings = [
+            {'user_id': user_id, 'date': date(2024, 3, 1 + day), 'duration': 90, 'places': 1,
+             'time': time(8 + user_id % 12)}
+            for day in range(28) for user_id in range(40)]
+        with mock.patch.object(view_handler, 'get_all_bookings', return_value=bookings), \
+                mock.patch.object(view_handler, 'get_user_name', side_effect=lambda uid: f'Пользователь {uid}'):
+            full = view_handler.render_bookings('all', today=date(2024, 3, 1))
+            messages = list(pack_messages(view_handler.iter_view_blocks('all', today=date(2024, 3, 1))))
+        self.assertGreater(len(full), 4096)
+        self.assertGreater(len(messages), 1)
+        self.assertTrue(all(len(message) <= 4096 for message in messages))
+        self.assertEqual(''.join(messages), full)
+
+
+if __name__ == '__main__':
+    unittest.main()
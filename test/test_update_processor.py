@@ -0,0 +1,66 @@
+import unittest
+import sys, os
+import asyncio
+import random
+from types import SimpleNamespace
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from source.update_processor import PerUserUpdateProcessor
+
+
+def make_update(user_id):
+    return SimpleNamespace(effective_user=SimpleNamespace(id=user_id), effective_chat=None)
+
+
+class TestPerUserUpdateProcessor(unittest.TestCase):
+    def test_same_user_in_order_other_users_concurrent(self):
+        rng = random.Random(16)
+        seen = {user_id: [] for user_id in range(5)}
+        running = {user_id: 0 for user_id in range(5)}
+        max_running = {'total': 0, 'now': 0}
+
+        async def handle(user_id, number):
+            running[user_id] += 1
+            max_running['now'] += 1
+            max_running['total'] = max(max_running['total'], max_running['now'])
+            self.assertEqual(running[user_id], 1)
+            await asyncio.sleep(rng.random() / 100)
+            seen[user_id].append(number)
+            running[user_id] -= 1
+            max_running['now'] -= 1
+
+        async def run():
+            processor = PerUserUpdateProcessor(16)
+            async with processor:
+                await asyncio.gather(*(processor.process_update(make_update(user_id), handle(user_id, number))
+                                       for number in range(10) for user_id in range(5)))
+            return processor
+
+        processor = asyncio.run(run())
+        self.assertEqual(seen, {user_id: list(range(10)) for user_id in range(5)})
+        self.assertGreater(max_running['total'], 1)
+        self.assertEqual(processor._user_locks, {})
+
+    def test_backlog_of_one_user_does_not_hold_up_others(self):
+        finished = []
+
+        async def handle(user_id, number):
+            await asyncio.sleep(0.01)
+            finished.append((user_id, number))
+
+        async def run():
+            processor = PerUserUpdateProcessor(4)
+            async with processor:
+                backlog = [asyncio.create_task(processor.process_update(make_update(1), handle(1, number)))
+                           for number in range(50)]
+                await asyncio.sleep(0)
+                await processor.process_update(make_update(2), handle(2, 0))
+                await asyncio.gather(*backlog)
+
+        asyncio.run(run())
+        # User 2 only waits for the update of user 1 already running, not for the queued ones
+        self.assertLessEqual(finished.index((2, 0)), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
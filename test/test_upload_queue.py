@@ -0,0 +1,106 @@
+import unittest
+import sys, os
+import asyncio
+import json
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from source.upload_queue import UploadQueue
+
+
+class FakeYandexDisk(BaseHTTPRequestHandler):
+    """Stand-in for the Yandex Disk upload API: GET returns an href, PUT stores the body."""
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        server.requests.append(('GET', self.path))
+        if server.failures:
+            server.failures -= 1
+            self.send_response(503)
+            self.end_headers()
+            return
+        remote_path = parse_qs(urlparse(self.path).query)['path'][0]
+        body = json.dumps({'href': f"http://127.0.0.1:{server.server_port}/put{remote_path}"}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_PUT(self):
+        server = self.server
+        server.requests.append(('PUT', self.path))
+        server.uploaded[self.path[len('/put'):]] = self.rfile.read(int(self.headers['Content-Length']))
+        self.send_response(201)
+        self.end_headers()
+
+
+class TestUploadQueue(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), FakeYandexDisk)
+        self.server.requests = []
+        self.server.uploaded = {}
+        self.server.failures = 0
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+        self.report = os.path.join(self.tmp_dir.name, '2025-03-18.txt')
+        with open(self.report, 'w', encoding='utf-8') as f:
+            f.write("Report on 18.03.2025\n")
+        self.pending_path = os.path.join(self.tmp_dir.name, 'pending_uploads.json')
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.tmp_dir.cleanup()
+
+    def make_queue(self, **kwargs):
+        return UploadQueue(lambda: 'token', self.pending_path,
+                           api_url=f"http://127.0.0.1:{self.server.server_port}/upload",
+                           remote_dir='/reports', backoff=0, **kwargs)
+
+    def run_queue(self, queue, *paths):
+        async def run():
+            await queue.start()
+            for path in paths:
+                queue.enqueue(path)
+            await queue.join()
+            await queue.stop()
+        asyncio.run(run())
+
+    def test_upload_retries_transient_errors(self):
+        self.server.failures = 2
+        queue = self.make_queue()
+        self.run_queue(queue, self.report)
+        self.assertEqual(self.server.uploaded, {'/reports/2025-03-18.txt': "Report on 18.03.2025\n".encode()})
+        self.assertEqual([method for method, _ in self.server.requests], ['GET', 'GET', 'GET', 'PUT'])
+        self.assertEqual(queue.pending(), [])
+
+    def test_pending_uploads_survive_restart(self):
+        self.server.failures = 10
+        queue = self.make_queue(max_attempts=2)
+        self.run_queue(queue, self.report)
+        self.assertEqual(queue.pending(), [self.report])
+
+        self.server.failures = 0
+        restarted = self.make_queue()
+        self.assertEqual(restarted.pending(), [self.report])
+        self.run_queue(restarted)
+        self.assertIn('/reports/2025-03-18.txt', self.server.uploaded)
+        self.assertEqual(restarted.pending(), [])
+
+    def test_missing_file_is_dropped(self):
+        queue = self.make_queue()
+        self.run_queue(queue, os.path.join(self.tmp_dir.name, 'missing.txt'))
+        self.assertEqual(queue.pending(), [])
+        self.assertEqual(self.server.requests, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+import unittest
+import sys, os
+import tempfile
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from source.user_registry import UserRegistry
+
+
+class TestUserRegistry(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, 'users.csv')
+        # As written by pandas: empty links are stored as empty fields
+        with open(self.path, 'w', encoding='utf-8') as f:
+            f.write("user_id,name,telegram_link\n"
+                    "1241016050,Ваня Новосад,https://t.me/Mellodizzz\n"
+                    "277218291,\"Петров, Пётр\",\n")
+        self.registry = UserRegistry(self.path)
+        self.registry.load()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def reload(self):
+        registry = UserRegistry(self.path)
+        registry.load()
+        return registry
+
+    def test_load(self):
+        self.assertTrue(self.registry.is_verified(1241016050))
+        self.assertFalse(self.registry.is_verified(42))
+        self.assertEqual(self.registry.get(277218291), ('Петров, Пётр', ''))
+        self.assertIsNone(self.registry.get(42))
+
+    def test_add_appends(self):
+        self.registry.add(42, 'Новый', None)
+        self.assertEqual(self.registry.get(42), ('Новый', ''))
+        with open(self.path, encoding='utf-8') as f:
+            self.assertTrue(f.read().endswith("\n42,Новый,\n"))
+        self.assertEqual(self.reload().all(), self.registry.all())
+
+    def test_rename_rewrites(self):
+        self.assertTrue(self.registry.rename(1241016050, 'Иван'))
+        self.assertFalse(self.registry.rename(42, 'Никто'))
+        self.assertEqual(self.reload().get(1241016050), ('Иван', 'https://t.me/Mellodizzz'))
+        self.assertEqual(len(self.reload()), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,145 @@
+import unittest
+import sys, os
+import asyncio
+import tempfile
+from datetime import datetime, timedelta
+from unittest import mock
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from source import data_handler, valid_book, waitlist_handler
+from source.async_io import SerialWriter
+from source.booking_store import BookingStore
+from source.waitlist import Waitlist
+
+
+TIMETABLE = {f'{day}_{edge}': hour
+             for day in ['mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun']
+             for edge, hour in [('open', '08:00'), ('close', '23:00')]}
+
+
+class TestWaitlist(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, 'waitlist.json')
+        self.waitlist = Waitlist(self.path)
+        self.waitlist.load()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_overlapping_groups_slots_first_come_first_served(self):
+        slot = datetime(2025, 3, 4, 19, 0)
+        self.waitlist.add(1, 1, slot, 60, 2)
+        self.waitlist.add(2, 2, slot - timedelta(minutes=90), 120, 1)
+        self.waitlist.add(3, 3, slot, 60, 1)
+        self.waitlist.add(4, 4, slot + timedelta(hours=2), 60, 1)
+        # Waiting twice for the same slot keeps the first entry
+        self.waitlist.add(1, 1, slot, 60, 3)
+
+        slots = self.waitlist.overlapping(slot, slot + timedelta(minutes=30))
+        self.assertEqual([[entry['user_id'] for entry in entries] for entries in slots], [[2], [1, 3]])
+        self.assertEqual(slots[1][0]['places'], 2)
+        self.assertEqual(len(self.waitlist.overlapping()), 3)
+
+        reloaded = Waitlist(self.path)
+        reloaded.load()
+        self.assertEqual(reloaded.all(), self.waitlist.all())
+
+    def test_remove_started(self):
+        slot = datetime(2025, 3, 4, 19, 0)
+        self.waitlist.add(1, 1, slot, 60, 1)
+        self.waitlist.add(2, 2, slot + timedelta(hours=1), 60, 1)
+        self.assertEqual([entry['user_id'] for entry in self.waitlist.remove_started(slot)], [1])
+        self.assertEqual(len(self.waitlist), 1)
+
+    def test_writes_go_through_writer(self):
+        writer = SerialWriter()
+        self.addCleanup(writer.shutdown)
+        waitlist = Waitlist(self.path, writer=writer)
+        with mock.patch.object(writer, 'submit', wraps=writer.submit) as submit:
+            waitlist.add(1, 1, datetime(2025, 3, 4, 19, 0), 60, 1)
+        self.assertEqual(submit.call_count, 1)
+
+        asyncio.run(waitlist.wait_written())
+        reloaded = Waitlist(self.path)
+        reloaded.load()
+        self.assertEqual(reloaded.all(), waitlist.all())
+
+
+class TestPromotion(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.store = BookingStore(os.path.join(self.tmp_dir.name, 'bookings.json'))
+        self.store.load()
+        self.waitlist = Waitlist(os.path.join(self.tmp_dir.name, 'waitlist.json'))
+        self.capacity = 6
+        patches = [
+            mock.patch.object(data_handler, '_store', self.store),
+            mock.patch.object(data_handler, '_waitlist', self.waitlist),
+            mock.patch.object(data_handler, 'get_max_bookings_per_hour', side_effect=lambda: self.capacity),
+            mock.patch.object(valid_book, 'get_gym_timetable', return_value=TIMETABLE),
+            mock.patch.object(valid_book, 'get_gym_closed_periods', side_effect=lambda: self.closure),
+        ]
+        self.closure = ("NaN", "NaN")
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_freed_places_go_to_waiting_users_in_order(self):
+        slot = (datetime.now() + timedelta(days=1)).replace(hour=19, minute=0, second=0, microsecond=0)
+        full = self.store.add(1, slot, places=6)
+        self.waitlist.add(2, 20, slot, 60, 4)
+        self.waitlist.add(3, 30, slot, 60, 4)
+        self.waitlist.add(4, 40, slot + timedelta(minutes=30), 60, 1)
+        bot = mock.Mock(send_message=mock.AsyncMock())
+
+        async def run():
+            self.assertEqual(await waitlist_handler.promote_waitlist(bot, slot, slot + timedelta(hours=1)), [])
+            self.store.remove([full['id']])
+            return await waitlist_handler.promote_waitlist(bot, slot, slot + timedelta(hours=1))
+
+        promoted = asyncio.run(run())
+        # User 3 is behind user 2 in the same slot and doesn't fit any more; user 4 waits for another slot
+        self.assertEqual([entry['user_id'] for entry in promoted], [2, 4])
+        self.assertEqual([call.args[0] for call in bot.send_message.await_args_list], [20, 40])
+        self.assertEqual([entry['user_id'] for entry in self.waitlist.all()], [3])
+
+        self.capacity = 10
+        promoted = asyncio.run(waitlist_handler.promote_waitlist(bot))
+        self.assertEqual([entry['user_id'] for entry in promoted], [3])
+        self.assertEqual(self.store.max_occupancy(slot, 60), 9)
+
+    def test_joining_clears_pending_booking(self):
+        slot = (datetime.now() + timedelta(days=1)).replace(hour=19, minute=0, second=0, microsecond=0)
+        query = mock.Mock(data=f"wait_{slot.strftime('%Y-%m-%d_%H:%M')}_2_60",
+                          answer=mock.AsyncMock(), edit_message_text=mock.AsyncMock())
+        update = mock.Mock(callback_query=query, effective_user=mock.Mock(id=2), effective_chat=mock.Mock(id=20))
+        context = mock.Mock(bot=mock.Mock(send_message=mock.AsyncMock()),
+                            user_data={'pending_booking': {'places': 1}})
+        with mock.patch.object(waitlist_handler, 'is_user_verified', return_value=True), \
+                mock.patch.object(waitlist_handler, 'get_user_status', return_value='wait_book_response'), \
+                mock.patch.object(waitlist_handler, 'set_user_status') as set_status:
+            self.store.add(1, slot, places=6)
+            asyncio.run(waitlist_handler.join_waitlist_callback(update, context))
+
+        self.assertNotIn('pending_booking', context.user_data)
+        set_status.assert_called_once_with(2, 'default')
+        self.assertEqual([entry['user_id'] for entry in self.waitlist.all()], [2])
+
+    def test_entries_no_longer_allowed_are_dropped(self):
+        slot = (datetime.now() + timedelta(days=1)).replace(hour=19, minute=0, second=0, microsecond=0)
+        self.waitlist.add(2, 20, slot, 60, 1)
+        self.closure = (slot.strftime("%Y-%m-%d 00:00:00"), (slot + timedelta(days=1)).strftime("%Y-%m-%d 00:00:00"))
+        bot = mock.Mock(send_message=mock.AsyncMock())
+
+        self.assertEqual(asyncio.run(waitlist_handler.promote_waitlist(bot)), [])
+        self.assertEqual(len(self.waitlist), 0)
+        self.assertEqual(self.store.all(), [])
+        self.assertIn("зал закрыт", bot.send_message.await_args.args[1])
+
+
+if __name__ == '__main__':
+    unittest.main()
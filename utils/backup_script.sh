@@ -15,3 +15,5 @@ TIMESTAMP=$(date +"%Y%m%d_%H%M%S")
 
 # Perform the copy using the specific SSH key
 scp -i "$SSH_KEY" "$REMOTE_USER@$REMOTE_HOST:$REMOTE_FILE" "$LOCAL_BACKUP_DIR/bookings_backup_$TIMESTAMP.json"
+# Bookings made since the last compaction live in the journal next to the snapshot
+scp -i "$SSH_KEY" "$REMOTE_USER@$REMOTE_HOST:${REMOTE_FILE%/*}/bookings.journal" "$LOCAL_BACKUP_DIR/bookings_journal_backup_$TIMESTAMP.jsonl"
@@ -0,0 +1,45 @@
+"""
+Throughput benchmark of update processing: the default one-at-a-time
+processing against PerUserUpdateProcessor.
+
+Each simulated update awaits `--latency` seconds, standing in for the
+Telegram API round trip of a reply. Run from the bot directory:
+    python utils/benchmark_updates.py [--users 50] [--messages 10] [--latency 0.05]
+"""
+import argparse
+import asyncio
+import sys, os
+import time
+from types import SimpleNamespace
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from telegram.ext import SimpleUpdateProcessor
+
+from source.update_processor import PerUserUpdateProcessor
+
+
+async def run(processor, users, messages, latency):
+    updates = [SimpleNamespace(effective_user=SimpleNamespace(id=user_id), effective_chat=None)
+               for _ in range(messages) for user_id in range(users)]
+
+    async def handle():
+        await asyncio.sleep(latency)
+
+    async with processor:
+        start = time.perf_counter()
+        await asyncio.gather(*(processor.process_update(update, handle()) for update in updates))
+        elapsed = time.perf_counter() - start
+    return len(updates) / elapsed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--messages', type=int, default=10)
+    parser.add_argument('--latency', type=float, default=0.05)
+    args = parser.parse_args()
+
+    for name, processor in [("sequential (default)", SimpleUpdateProcessor(1)),
+                            ("per-user concurrent", PerUserUpdateProcessor())]:
+        rate = asyncio.run(run(processor, args.users, args.messages, args.latency))
+        print(f"{name}: {rate:.1f} updates/s")
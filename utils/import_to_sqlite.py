@@ -0,0 +1,20 @@
+"""
+One-shot import of bookings.json/bookings.journal, users.csv and
+data/user_status.json into the SQLite database.
+
+Run from the bot directory, then set "storage_backend": "sqlite" in data/config.json:
+    python utils/import_to_sqlite.py [data/bot.sqlite3]
+"""
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from source.data_handler import SQLITE_FILE
+from source.sqlite_backend import SQLiteBackend
+
+
+if __name__ == "__main__":
+    backend = SQLiteBackend(sys.argv[1] if len(sys.argv) > 1 else SQLITE_FILE)
+    counts = backend.import_from_files()
+    backend.close()
+    print(f"Imported {counts['bookings']} bookings, {counts['users']} users, "
+          f"{counts['user_statuses']} user statuses into {backend.path}")
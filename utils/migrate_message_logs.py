@@ -0,0 +1,19 @@
+"""
+One-shot migration of the old per-message message_logs/message_*.json files
+into the daily JSONL message logs. The migrated files are removed.
+
+Run from the bot directory:
+    python utils/migrate_message_logs.py [message_logs] [--gzip]
+"""
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from source.data_handler import MESSAGE_LOG_DIR
+from source.message_log import migrate_message_files
+
+
+if __name__ == "__main__":
+    args = [arg for arg in sys.argv[1:] if arg != '--gzip']
+    log_dir = args[0] if args else MESSAGE_LOG_DIR
+    count = migrate_message_files(log_dir, compress='--gzip' in sys.argv[1:])
+    print(f"Migrated {count} messages into daily logs in {log_dir}")